@@ -0,0 +1,81 @@
+import argparse
+import random
+import timeit
+
+from bench_pipeline import (page_markdown)
+from block_markdown import (
+    BlockType, markdown_to_blocks, block_to_block_type, block_to_html_node, block_type_to_html_node
+)
+
+
+def block_to_block_type_legacy(block):
+    '''
+    Docstring for block_to_block_type_legacy
+    Goal: the old block_to_block_type - chained startswith checks over a new split of the block,
+    an f-string per ordered list line
+    Kept here only to compare against the table driven classifier
+    '''
+    lines = block.split("\n")
+
+    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
+        return BlockType.HEADING
+    if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
+        return BlockType.CODE
+    if block.startswith(">"):
+        for line in lines:
+            if not line.startswith(">"):
+                return BlockType.PARAGRAPH
+        return BlockType.QUOTE
+    if block.startswith("- "):
+        for line in lines:
+            if not line.startswith("- "):
+                return BlockType.PARAGRAPH
+        return BlockType.ULIST
+    if block.startswith("1. "):
+        i = 1
+        for line in lines:
+            if not line.startswith(f"{i}. "):
+                return BlockType.PARAGRAPH
+            i += 1
+        return BlockType.OLIST
+    return BlockType.PARAGRAPH
+
+
+def block_to_html_node_legacy(block):
+    #old path: classify, then the helper splits the block again
+    return block_type_to_html_node(block, block_to_block_type_legacy(block))
+
+
+def time_it(function, blocks):
+    timer = timeit.Timer(lambda: [function(block) for block in blocks])
+    loops, total = timer.autorange()
+    return total / loops
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the block classifier with the old one")
+    parser.add_argument("--blocks", type=int, default=200, help="blocks per document")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'document':<10} {'step':<22} {'old (ms)':>10} {'new (ms)':>10} {'speedup':>9}")
+    for shape in ["lists", "mixed", "code"]:
+        blocks = markdown_to_blocks(page_markdown(rng, shape, args.blocks))
+        for block in blocks:
+            if block_to_block_type_legacy(block) != block_to_block_type(block):
+                raise Exception(f"block types differ for {block[:40]!r}")
+            if block_to_html_node_legacy(block).to_html() != block_to_html_node(block).to_html():
+                raise Exception(f"html nodes differ for {block[:40]!r}")
+        steps = [
+            ("block_to_block_type", block_to_block_type_legacy, block_to_block_type),
+            ("block_to_html_node", block_to_html_node_legacy, block_to_html_node),
+        ]
+        for step, old_function, new_function in steps:
+            old = time_it(old_function, blocks)
+            new = time_it(new_function, blocks)
+            print(f"{shape:<10} {step:<22} {old * 1000:>10.3f} {new * 1000:>10.3f} {old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
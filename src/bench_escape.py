@@ -0,0 +1,74 @@
+import argparse
+import html
+import random
+import timeit
+from unittest.mock import (patch)
+
+from bench_pipeline import (page_markdown)
+from block_markdown import (markdown_to_html_node)
+from htmlnode import (escape_text)
+
+escape_table = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"})
+
+
+def escape_translate(text):
+    return text.translate(escape_table)
+
+
+def escape_html_module(text):
+    return html.escape(text, quote=False)
+
+
+def escape_replace(text):
+    #escape_text without its fast path
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def no_escape(text):
+    #the serializer before escaping
+    return text
+
+
+def text_values(node):
+    #every text of the tree, the inputs of the escaper
+    stack = [node]
+    values = []
+    while stack:
+        node = stack.pop()
+        if node.children is not None:
+            stack.extend(node.children)
+        elif node.value is not None:
+            values.append(node.value)
+    return values
+
+
+def time_it(function):
+    #fastest of a few runs, a big page is slow enough for noise to matter
+    timer = timeit.Timer(function)
+    loops, total = timer.autorange()
+    return min(timer.repeat(5, loops)) / loops
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time html escaping: escapers on their own, and whole pages serialized")
+    parser.add_argument("--blocks", type=int, default=3000, help="blocks of the page, a big page by default")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for shape in ["mixed", "code"]:
+        node = markdown_to_html_node(page_markdown(rng, shape, args.blocks))
+        values = text_values(node)
+        special = sum(1 for value in values if escape_text(value) != value)
+        print(f"{shape}: {len(values)} text node(s), {special} with something to escape")
+        for name, escaper in [("no escaping", no_escape), ("str.translate", escape_translate),
+                              ("html.escape", escape_html_module), ("str.replace", escape_replace),
+                              ("escape_text", escape_text)]:
+            alone = time_it(lambda: [escaper(value) for value in values])
+            with patch("htmlnode.escape_text", escaper):
+                page = time_it(lambda: node.to_html())
+            print(f"  {name:<14} escaping {alone * 1000:>8.3f} ms   page to_html {page * 1000:>8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import timeit
+
+from inline_markdown import (
+    split_nodes_delimiter, split_nodes_image, split_nodes_link, text_to_textnodes
+)
+from textnode import TextNode, TextType
+
+
+def text_to_textnodes_multipass(text):
+    '''
+    Docstring for text_to_textnodes_multipass
+    Goal: the old text_to_textnodes - one pass per delimiter, then images, then links
+    Kept here only to compare against the single pass scanner
+    '''
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    return split_nodes_link(nodes)
+
+
+def link_heavy_paragraph(links):
+    parts = []
+    for i in range(links):
+        parts.append(f"see [post number {i}](/blog/post-{i}) and ![picture {i}](/images/{i}.png)")
+    return " ".join(parts)
+
+
+def time_it(function, text):
+    timer = timeit.Timer(lambda: function(text))
+    loops, total = timer.autorange()
+    return total / loops
+
+
+def main():
+    print(f"{'links':>8} {'multipass (ms)':>16} {'single pass (ms)':>18} {'speedup':>9}")
+    for links in [10, 100, 1000, 5000]:
+        text = link_heavy_paragraph(links)
+        if text_to_textnodes_multipass(text) != text_to_textnodes(text):
+            raise Exception(f"results differ for {links} links")
+        old = time_it(text_to_textnodes_multipass, text)
+        new = time_it(text_to_textnodes, text)
+        print(f"{links:>8} {old * 1000:>16.3f} {new * 1000:>18.3f} {old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
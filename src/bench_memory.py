@@ -0,0 +1,115 @@
+import argparse
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_pipeline import (page_markdown, template_path)
+from block_markdown import (markdown_to_html_node)
+
+
+def peak_rss_mb():
+    #VmHWM starts over in a new process, ru_maxrss can carry the parent's peak across fork/exec on Linux
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status", "r") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    #ru_maxrss is in kilobytes on Linux (bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def synthetic_markdown(size_mb, seed=0):
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    while size < size_mb * 1024 * 1024:
+        part = page_markdown(rng, "mixed", 200)
+        parts.append(part)
+        size += len(part)
+    return "\n".join(parts)
+
+
+def count_nodes(node):
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if node.children is not None:
+            stack.extend(node.children)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak RSS of parsing one large markdown document into nodes")
+    parser.add_argument("--size", type=float, default=10, help="document size in MB")
+    parser.add_argument("--page", action="store_true",
+                        help="measure generate_page from a file on disk to a file on disk instead of the node tree")
+    args = parser.parse_args()
+
+    markdown = synthetic_markdown(args.size)
+    if args.page:
+        measure_page(markdown)
+        return
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    node = markdown_to_html_node(markdown)
+    seconds = time.perf_counter() - start
+    after = peak_rss_mb()
+
+    print(f"document           {len(markdown) / (1024 * 1024):>10.1f} MB")
+    print(f"nodes              {count_nodes(node):>10}")
+    print(f"parse time         {seconds:>10.2f} s")
+    print(f"peak RSS before    {before:>10.1f} MB")
+    print(f"peak RSS after     {after:>10.1f} MB")
+    print(f"tree cost          {after - before:>10.1f} MB")
+
+
+def measure_page(markdown):
+    '''
+    Docstring for measure_page
+    Goal: peak RSS of generate_page on a file, measured in a fresh process so the
+    generated document does not count - the pipelined generate_page should not grow with the document size
+    '''
+    with tempfile.TemporaryDirectory() as tmp:
+        from_path = os.path.join(tmp, "index.md")
+        with open(from_path, "w") as file:
+            file.write(markdown)
+        size = len(markdown)
+        before = child_peak_rss_mb("pass")
+        start = time.perf_counter()
+        after = child_peak_rss_mb(
+            f"generate_page({from_path!r}, {template_path!r}, {os.path.join(tmp, 'index.html')!r}, '/')"
+        )
+        seconds = time.perf_counter() - start
+
+    print(f"document           {size / (1024 * 1024):>10.1f} MB")
+    print(f"generate_page      {seconds:>10.2f} s")
+    print(f"peak RSS imports   {before:>10.1f} MB")
+    print(f"peak RSS page      {after:>10.1f} MB")
+    print(f"page cost          {after - before:>10.1f} MB")
+
+
+def child_peak_rss_mb(statement):
+    code = (
+        "import sys, contextlib, io\n"
+        f"sys.path.insert(0, {os.path.dirname(os.path.abspath(__file__))!r})\n"
+        "from bench_memory import peak_rss_mb\n"
+        "from handle_files import generate_page\n"
+        "with contextlib.redirect_stdout(io.StringIO()):\n"
+        f"    {statement}\n"
+        "print(peak_rss_mb())\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(result.stdout.strip())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+
+from block_markdown import (markdown_to_blocks, block_to_block_type, block_to_html_node, BlockType)
+from handle_files import (collect_pages)
+from inline_markdown import (text_to_textnodes)
+from htmlnode import (ParentNode)
+from template import (load_template)
+
+template_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "template.html")
+
+# the stages timed for every page, in pipeline order
+stages = [
+    "read",
+    "markdown_to_blocks",
+    "block_to_block_type",
+    "text_to_textnodes",
+    "block_to_html_node",
+    "to_html",
+    "template_fill",
+    "write",
+]
+
+words = ["middle", "earth", "ring", "hobbit", "wizard", "elf", "dwarf", "shire", "mordor", "river",
+         "mountain", "song", "tale", "road", "king", "shadow", "light", "forest", "tower", "gate"]
+
+
+def sentence(rng, length):
+    return " ".join(rng.choice(words) for i in range(length))
+
+
+def inline_text(rng, length, links=0):
+    parts = [sentence(rng, length)]
+    if rng.random() < 0.5:
+        parts.append(f"**{sentence(rng, 2)}**")
+    if rng.random() < 0.5:
+        parts.append(f"_{sentence(rng, 2)}_")
+    if rng.random() < 0.3:
+        parts.append(f"`{rng.choice(words)}`")
+    for i in range(links):
+        parts.append(f"[{sentence(rng, 2)}](/blog/{rng.choice(words)}-{i})")
+        parts.append(sentence(rng, 3))
+    return " ".join(parts)
+
+
+def paragraph(rng, links=0):
+    lines = [inline_text(rng, rng.randint(5, 15), links) for i in range(rng.randint(1, 4))]
+    return "\n".join(lines)
+
+
+def ulist(rng, items):
+    return "\n".join(f"- {inline_text(rng, rng.randint(3, 8))}" for i in range(items))
+
+
+def olist(rng, items):
+    return "\n".join(f"{i + 1}. {inline_text(rng, rng.randint(3, 8))}" for i in range(items))
+
+
+def code(rng, lines):
+    body = "\n".join(f"    let {rng.choice(words)} = {rng.choice(words)}({i});" for i in range(lines))
+    return f"```\n{body}\n```"
+
+
+def quote(rng):
+    return "\n".join(f"> {sentence(rng, rng.randint(4, 10))}" for i in range(rng.randint(1, 4)))
+
+
+def page_markdown(rng, shape, blocks):
+    '''
+    Docstring for page_markdown
+    Goal: one synthetic markdown page
+
+    :param shape: mixed, links (link dense paragraphs), lists (long lists), code (large code blocks)
+    :param blocks: number of blocks after the title
+    '''
+    parts = [f"# {sentence(rng, 4)}"]
+    for i in range(blocks):
+        if shape == "links":
+            parts.append(paragraph(rng, links=20))
+        elif shape == "lists":
+            parts.append(ulist(rng, 200) if i % 2 == 0 else olist(rng, 200))
+        elif shape == "code":
+            parts.append(code(rng, 300))
+        else:
+            kind = rng.choice(["paragraph", "paragraph", "heading", "ulist", "olist", "code", "quote"])
+            if kind == "paragraph":
+                parts.append(paragraph(rng, links=rng.randint(0, 2)))
+            elif kind == "heading":
+                parts.append(f"{'#' * rng.randint(2, 6)} {sentence(rng, 4)}")
+            elif kind == "ulist":
+                parts.append(ulist(rng, rng.randint(2, 8)))
+            elif kind == "olist":
+                parts.append(olist(rng, rng.randint(2, 8)))
+            elif kind == "code":
+                parts.append(code(rng, rng.randint(2, 20)))
+            else:
+                parts.append(quote(rng))
+    return "\n\n".join(parts) + "\n"
+
+
+def generate_corpus(dir_path_content, pages, shape="mixed", blocks=30, huge_pages=0, seed=0):
+    '''
+    Docstring for generate_corpus
+    Goal: write a synthetic content tree, the same for the same arguments
+
+    :param pages: number of regular pages
+    :param shape: see page_markdown
+    :param blocks: blocks per regular page
+    :param huge_pages: number of extra pages with 100x more blocks
+    :returns: total size in bytes
+    '''
+    rng = random.Random(seed)
+    total = 0
+    for i in range(pages + huge_pages):
+        page_blocks = blocks if i < pages else blocks * 100
+        dir_path = os.path.join(dir_path_content, "blog", f"post-{i // 100}", f"{i}")
+        os.makedirs(dir_path, exist_ok=True)
+        markdown = page_markdown(rng, shape, page_blocks)
+        with open(os.path.join(dir_path, "index.md"), "w") as file:
+            file.write(markdown)
+        total += len(markdown)
+    return total
+
+
+def inline_texts(block, block_type):
+    #the text each block helper hands to text_to_children
+    lines = block.split("\n")
+    if block_type == BlockType.CODE:
+        return []
+    if block_type == BlockType.PARAGRAPH:
+        return [" ".join(lines)]
+    if block_type == BlockType.HEADING:
+        return [block.lstrip("#")[1:]]
+    if block_type == BlockType.QUOTE:
+        return [" ".join(line.lstrip(">").strip() for line in lines)]
+    if block_type == BlockType.ULIST:
+        return [line[2:] for line in lines]
+    return [line.split(". ", 1)[1] for line in lines]
+
+
+def run_pipeline(pages, template, repeat=1):
+    '''
+    Docstring for run_pipeline
+    Goal: run every page through the pipeline, timing each stage separately
+
+    :param pages: list of (from_path, dest_path)
+    :param repeat: run the whole corpus this many times and keep the fastest time of every stage
+    :returns: dict stage -> seconds
+    '''
+    best = None
+    for i in range(repeat):
+        timings = dict.fromkeys(stages, 0.0)
+        for from_path, dest_path in pages:
+            start = time.perf_counter()
+            with open(from_path, "r") as file:
+                markdown = file.read()
+            timings["read"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            blocks = markdown_to_blocks(markdown)
+            timings["markdown_to_blocks"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            block_types = [block_to_block_type(block) for block in blocks]
+            timings["block_to_block_type"] += time.perf_counter() - start
+
+            texts = []
+            for block, block_type in zip(blocks, block_types):
+                texts.extend(inline_texts(block, block_type))
+            start = time.perf_counter()
+            for text in texts:
+                text_to_textnodes(text)
+            timings["text_to_textnodes"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            node = ParentNode("div", [block_to_html_node(block) for block in blocks])
+            timings["block_to_html_node"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            node.to_html()
+            timings["to_html"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            out = io.StringIO()
+            template.render(out, "title", node)
+            html = out.getvalue()
+            timings["template_fill"] += time.perf_counter() - start
+
+            start = time.perf_counter()
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            with open(dest_path, "w") as file:
+                file.write(html)
+            timings["write"] += time.perf_counter() - start
+        if best is None:
+            best = timings
+        else:
+            best = {stage: min(best[stage], timings[stage]) for stage in stages}
+    return best
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(result, baseline):
+    print(f"{'stage':<22} {'baseline (s)':>14} {'now (s)':>10} {'ratio':>8}")
+    for stage in stages:
+        old = baseline["stages"].get(stage)
+        new = result["stages"][stage]
+        if old is None or old == 0:
+            print(f"{stage:<22} {'-':>14} {new:>10.4f}")
+            continue
+        print(f"{stage:<22} {old:>14.4f} {new:>10.4f} {new / old:>7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every stage of the pipeline on a synthetic corpus")
+    parser.add_argument("--pages", type=int, default=200, help="number of regular pages")
+    parser.add_argument("--blocks", type=int, default=30, help="blocks per regular page")
+    parser.add_argument("--huge-pages", type=int, default=0, help="extra pages with 100x the blocks")
+    parser.add_argument("--shape", choices=["mixed", "links", "lists", "code"], default="mixed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="keep the fastest of this many runs")
+    parser.add_argument("--output", help="write the results as JSON into this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare with")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dir_path_content = os.path.join(tmp, "content")
+        corpus_bytes = generate_corpus(dir_path_content, args.pages, args.shape, args.blocks,
+                                       args.huge_pages, args.seed)
+        pages = collect_pages(dir_path_content, os.path.join(tmp, "public"))
+        template = load_template(template_path, "/")
+        timings = run_pipeline(pages, template, args.repeat)
+
+    result = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "corpus": {
+            "pages": args.pages,
+            "huge_pages": args.huge_pages,
+            "blocks": args.blocks,
+            "shape": args.shape,
+            "seed": args.seed,
+            "bytes": corpus_bytes,
+        },
+        "stages": timings,
+        "total": sum(timings.values()),
+    }
+
+    if args.compare:
+        with open(args.compare, "r") as file:
+            compare(result, json.load(file))
+    else:
+        for stage in stages:
+            print(f"{stage:<22} {timings[stage]:>10.4f} s")
+        print(f"{'total':<22} {result['total']:>10.4f} s")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(result, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
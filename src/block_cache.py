@@ -0,0 +1,70 @@
+import os
+import pickle
+from collections import (OrderedDict)
+
+
+class BlockCache():
+    '''
+    Bounded LRU cache of block HTMLNodes, keyed by (block type, block text)
+    Footers, disclaimers, shared list items and headings repeat across a site -
+    a repeated block is parsed once and its node tree is shared (nodes are never changed after parsing)
+
+    The nodes are cached, not their HTML string - the basepath (and other url rewriting)
+    is applied when serializing, so one cached node works for every build setting
+    '''
+    def __init__(self, max_entries=10000, max_block_length=10000):
+        self.max_entries = max_entries
+        self.max_block_length = max_block_length
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        node = self.entries.get(key)
+        if node is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return node
+
+    def put(self, key, node):
+        #very long blocks are unlikely to repeat, and would pin a lot of memory
+        if len(key[1]) > self.max_block_length:
+            return
+        self.entries[key] = node
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def load(self, path, fingerprint):
+        '''
+        Docstring for load
+        Goal: load the entries saved by an earlier build
+
+        :param fingerprint: the entries are only used if saved with the same fingerprint (hash of the generator code)
+        '''
+        if not os.path.exists(path):
+            return self
+        try:
+            with open(path, "rb") as file:
+                data = pickle.load(file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            #broken cache is the same as no cache
+            return self
+        if data.get("fingerprint") != fingerprint:
+            return self
+        for key, node in data["entries"].items():
+            self.put(key, node)
+        return self
+
+    def save(self, path, fingerprint):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            pickle.dump({"fingerprint": fingerprint, "entries": self.entries}, file, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+    def __repr__(self):
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total > 0 else 0.0
+        return f"BlockCache({len(self.entries)} entries, {self.hits} hits, {self.misses} misses, {rate:.1f}% hit rate)"
@@ -14,43 +14,126 @@ class BlockType(Enum):
     OLIST       = "ordered_list"
 
 
+# the tag all blocks of a page are wrapped in
+page_tag = "div"
+
+# one shared string per heading tag, instead of a new f"h{level}" string for every heading
+heading_tags = {level: f"h{level}" for level in range(1, 7)}
+
 
 def markdown_to_blocks(markdown):
-    blocks = markdown.split("\n\n")
-    filtered_blocks = []
-    for block in blocks:
-        if block == "":
+    return list(iter_blocks(markdown.split("\n")))
+
+
+def iter_blocks(lines):
+    '''
+    Docstring for iter_blocks
+    Goal: split markdown into blocks lazily, one block at a time
+    Blocks are separated by blank lines, except inside a fenced ``` code block -
+    there blank lines are part of the code
+
+    :param lines: any iterable of lines, e.g. an open file - it is never read whole
+    :returns: generator of stripped blocks
+    '''
+    block_lines = []
+    in_fence = False
+    for line in lines:
+        line = line.rstrip("\r\n")
+        stripped = line.strip()
+        if stripped == "" and not in_fence:
+            if len(block_lines) > 0:
+                yield "\n".join(block_lines).strip()
+                block_lines = []
             continue
-        block = block.strip()
-        filtered_blocks.append(block)
-    return filtered_blocks
+        #a ``` line closes the code block; it only opens one at the start of a block, and only if
+        #no other backtick follows (not ```code``` on one line, not ```x``` starting a paragraph)
+        if in_fence:
+            if stripped.startswith("```"):
+                in_fence = False
+        elif len(block_lines) == 0 and stripped.startswith("```") and "`" not in stripped.lstrip("`"):
+            in_fence = True
+        block_lines.append(line)
+    if len(block_lines) > 0:
+        yield "\n".join(block_lines).strip()
 
 
-def block_to_block_type(block):
+# "# " to "###### " at the start of the block
+heading_pattern = re.compile(r"#{1,6} ")
+
+# "1. ", "2. ", ... - grown when a longer ordered list shows up, instead of an f-string per line
+olist_prefixes = ["1. "]
+
+
+def olist_prefix(index):
+    while len(olist_prefixes) <= index:
+        olist_prefixes.append(f"{len(olist_prefixes) + 1}. ")
+    return olist_prefixes[index]
+
+
+def classify_heading(block):
+    if heading_pattern.match(block) is not None:
+        return BlockType.HEADING, None
+    return BlockType.PARAGRAPH, None
+
+
+def classify_code(block):
+    #more than one line, the first and the last one start with ```
+    last_line_start = block.rfind("\n") + 1
+    if last_line_start > 0 and block.startswith("```") and block.startswith("```", last_line_start):
+        return BlockType.CODE, None
+    return BlockType.PARAGRAPH, None
+
+
+def classify_quote(block):
+    #every line starts with > when every new line is followed by >
+    if block.count("\n>") == block.count("\n"):
+        return BlockType.QUOTE, None
+    return BlockType.PARAGRAPH, None
+
+
+def classify_ulist(block):
+    if block.startswith("- ") and block.count("\n- ") == block.count("\n"):
+        return BlockType.ULIST, None
+    return BlockType.PARAGRAPH, None
+
+
+def classify_olist(block):
+    if not block.startswith("1. "):
+        return BlockType.PARAGRAPH, None
     lines = block.split("\n")
+    olist_prefix(len(lines) - 1)
+    for line, prefix in zip(lines, olist_prefixes):
+        if not line.startswith(prefix):
+            return BlockType.PARAGRAPH, lines
+    return BlockType.OLIST, lines
+
+
+# the first character of a block decides which check can match at all, any other character is a paragraph
+block_classifiers = {
+    "#": classify_heading,
+    "`": classify_code,
+    ">": classify_quote,
+    "-": classify_ulist,
+    "1": classify_olist,
+}
 
-    if block.startswith(("# ", "## ", "### ", "#### ", "##### ", "###### ")):
-        return BlockType.HEADING
-    if len(lines) > 1 and lines[0].startswith("```") and lines[-1].startswith("```"):
-        return BlockType.CODE
-    if block.startswith(">"):
-        for line in lines:
-            if not line.startswith(">"):
-                return BlockType.PARAGRAPH
-        return BlockType.QUOTE
-    if block.startswith("- "):
-        for line in lines:
-            if not line.startswith("- "):
-                return BlockType.PARAGRAPH
-        return BlockType.ULIST
-    if block.startswith("1. "):
-        i = 1
-        for line in lines:
-            if not line.startswith(f"{i}. "):
-                return BlockType.PARAGRAPH
-            i += 1
-        return BlockType.OLIST
-    return BlockType.PARAGRAPH
+
+def classify_block(block):
+    '''
+    Docstring for classify_block
+    Goal: the type of the block, with a single check picked by its first character
+    The lines are returned too when the check had to split them, so the block is never split twice
+
+    :returns: tuple (BlockType, list of lines or None)
+    '''
+    classifier = block_classifiers.get(block[:1])
+    if classifier is None:
+        return BlockType.PARAGRAPH, None
+    return classifier(block)
+
+
+def block_to_block_type(block):
+    return classify_block(block)[0]
 
 
 def markdown_to_html_node(markdown):
@@ -58,17 +141,50 @@ def markdown_to_html_node(markdown):
     Docstring for markdown_to_html_node
     Goal: split markdown into blocks, turn them into HTMLNodes
 
-    :param markdown: string representing Markdown
+    :param markdown: string representing Markdown, or an iterable of its lines (e.g. an open file)
+    :returns: One giant parent node with all blocks as chlidren
+    '''
+    if isinstance(markdown, str):
+        markdown = markdown.split("\n")
+    #blocks are parsed one by one as they are split, the list of all blocks is never built
+    return blocks_to_html_node(iter_blocks(markdown))
+
+
+def blocks_to_html_node(blocks):
+    '''
+    Docstring for blocks_to_html_node
+    Goal: the second half of markdown_to_html_node, for when the blocks are already split
+
+    :param blocks: list or generator of blocks, see markdown_to_blocks / iter_blocks
     :returns: One giant parent node with all blocks as chlidren
     '''
-    blocks = markdown_to_blocks(markdown)
     children = []
     for block in blocks:
         #call the aggregated function to turn block into HTMLNode, it will call severa support functions for this
         html_node = block_to_html_node(block)
         children.append(html_node)
     #everything will be just under <div> 
-    return ParentNode("div", children, None)
+    return ParentNode(page_tag, children, None)
+
+
+# optional BlockCache (see block_cache module) shared by every page parsed in this process
+block_cache = None
+
+
+def set_block_cache(cache):
+    '''
+    Docstring for set_block_cache
+    Goal: turn the block cache on (or off with None) for this process
+    Also used as the initializer of the worker processes, each worker gets its own copy
+
+    :param cache: BlockCache or None
+    '''
+    global block_cache
+    block_cache = cache
+
+
+def get_block_cache():
+    return block_cache
 
 
 def block_to_html_node(block):
@@ -80,23 +196,30 @@ def block_to_html_node(block):
     :returns: call to a helper function creating HTMLNode
     '''
     #read the type of the block first
-    block_type = block_to_block_type(block)
-    if block_type == BlockType.PARAGRAPH:
-        return paragraph_to_html_node(block)
-    if block_type == BlockType.HEADING:
-        return heading_to_html_node(block)
-    if block_type == BlockType.CODE:
-        return code_to_html_node(block)
-    if block_type == BlockType.OLIST:
-        return olist_to_html_node(block)
-    if block_type == BlockType.ULIST:
-        return ulist_to_html_node(block)
-    if block_type == BlockType.QUOTE:
-        return quote_to_html_node(block)
-    raise ValueError("invalid block type")
+    block_type, lines = classify_block(block)
+    if block_cache is None:
+        return block_type_to_html_node(block, block_type, lines)
 
+    key = (block_type, block)
+    html_node = block_cache.get(key)
+    if html_node is None:
+        html_node = block_type_to_html_node(block, block_type, lines)
+        block_cache.put(key, html_node)
+    return html_node
 
 
+def block_type_to_html_node(block, block_type, lines=None):
+    '''
+    Docstring for block_type_to_html_node
+    Goal: call the helper of the block type
+
+    :param lines: the block split into lines if already done (see classify_block), None otherwise
+    '''
+    converter = block_converters.get(block_type)
+    if converter is None:
+        raise ValueError("invalid block type")
+    return converter(block, lines)
+
 
 def text_to_children(text):
     '''
@@ -117,23 +240,25 @@ def text_to_children(text):
 
 
 ### Helper functions to create the HTML nodes
-def paragraph_to_html_node(block):
+def paragraph_to_html_node(block, lines=None):
     '''
     Docstring for paragraph_to_html_node
     Goal: turn paragraph block into a parent node with its chilren
     
     :param block: block from MD
+    :param lines: optional block already split into lines
     '''
-    #split block into list by new lines
-    lines = block.split("\n")
-    #join them all together, but space separated
-    paragraph = " ".join(lines)
+    #join all the lines together, but space separated
+    if lines is None:
+        paragraph = block.replace("\n", " ")
+    else:
+        paragraph = " ".join(lines)
 
     children = text_to_children(paragraph)
     return ParentNode("p", children)
 
 
-def heading_to_html_node(block):
+def heading_to_html_node(block, lines=None):
     '''
     Docstring for heading_to_html_node
     Turn a heading block into a parent node with its children
@@ -152,10 +277,10 @@ def heading_to_html_node(block):
         raise ValueError(f"invalid heading level: {level}")
     text = block[level + 1 :]
     children = text_to_children(text)
-    return ParentNode(f"h{level}", children)
+    return ParentNode(heading_tags.get(level) or f"h{level}", children)
 
 
-def code_to_html_node(block):
+def code_to_html_node(block, lines=None):
     '''
     Docstring for code_to_html_node
     Goal: turn code block into HTML node 
@@ -176,15 +301,16 @@ def code_to_html_node(block):
     return ParentNode("pre", [code])
 
 
-def olist_to_html_node(block):
+def olist_to_html_node(block, lines=None):
     '''
     Docstring for olist_to_html_node
     Goal: turn ordered md list into HTML node
 
     :param block: block from MD
+    :param lines: optional block already split into lines
     '''
     #split by newline char, turn the list items into nodes using text_to_children (inline_markdown)
-    items = block.split("\n")
+    items = lines if lines is not None else block.split("\n")
     html_items = []
     for item in items:
         parts = item.split(". ", 1)
@@ -195,16 +321,17 @@ def olist_to_html_node(block):
     return ParentNode("ol", html_items)
 
 
-def ulist_to_html_node(block):
+def ulist_to_html_node(block, lines=None):
     '''
     Docstring for ulist_to_html_node
     Goal: turn unordered md list into HTML node
 
 
     :param block: block from MD
+    :param lines: optional block already split into lines
     '''
     #split by newline char, turn the list items into nodes using text_to_children (inline_markdown)
-    items = block.split("\n")
+    items = lines if lines is not None else block.split("\n")
     html_items = []
     for item in items:
         text = item[2:]
@@ -213,14 +340,16 @@ def ulist_to_html_node(block):
     return ParentNode("ul", html_items)
 
 
-def quote_to_html_node(block):
+def quote_to_html_node(block, lines=None):
     '''
     Docstring for quote_to_html_node
     Goal: turn MD citation into HTML node
 
     :param block: block from MD
+    :param lines: optional block already split into lines
     '''
-    lines = block.split("\n")
+    if lines is None:
+        lines = block.split("\n")
     new_lines = []
     for line in lines:
         if not line.startswith(">"):
@@ -229,3 +358,14 @@ def quote_to_html_node(block):
     content = " ".join(new_lines)
     children = text_to_children(content)
     return ParentNode("blockquote", children)
+
+
+# helper of every block type, see block_type_to_html_node
+block_converters = {
+    BlockType.PARAGRAPH: paragraph_to_html_node,
+    BlockType.HEADING: heading_to_html_node,
+    BlockType.CODE: code_to_html_node,
+    BlockType.OLIST: olist_to_html_node,
+    BlockType.ULIST: ulist_to_html_node,
+    BlockType.QUOTE: quote_to_html_node,
+}
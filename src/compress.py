@@ -0,0 +1,149 @@
+import gzip
+import os
+from concurrent.futures import (ThreadPoolExecutor)
+
+from content_index import (ContentIndex)
+
+try:
+    import brotli
+except ImportError:
+    #no .br siblings without the brotli package, .gz ones are enough for every server
+    brotli = None
+
+# text outputs only, images and fonts are compressed already
+compress_extensions = {".html", ".css", ".js", ".svg", ".xml", ".txt", ".json"}
+# smaller files do not get smaller, the headers of the compressed file outweigh the savings
+compress_min_size = 256
+gzip_level = 9
+brotli_quality = 11
+
+
+def gzip_bytes(data):
+    #mtime=0, the same page always gives the same .gz
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def brotli_bytes(data):
+    return brotli.compress(data, quality=brotli_quality)
+
+
+def sibling_encoders():
+    #suffix of the compressed sibling -> function compressing the bytes of the file
+    encoders = {".gz": gzip_bytes}
+    if brotli is not None:
+        encoders[".br"] = brotli_bytes
+    return encoders
+
+
+class CompressStats():
+    def __init__(self):
+        self.written_files = 0
+        self.saved_bytes = 0
+        self.skipped_files = 0
+        self.removed_files = 0
+
+    def add(self, other):
+        self.written_files += other.written_files
+        self.saved_bytes += other.saved_bytes
+        self.skipped_files += other.skipped_files
+        self.removed_files += other.removed_files
+
+    def __repr__(self):
+        return (f"wrote {self.written_files} compressed file(s) saving {self.saved_bytes} bytes, "
+                f"skipped {self.skipped_files} up to date, removed {self.removed_files} stale")
+
+
+def compress_file(path, stat=None, encoders=None):
+    '''
+    Docstring for compress_file
+    Goal: write the compressed siblings of one output file, e.g. index.html.gz and index.html.br
+    A sibling gets the mtime of its file, so it is up to date while the mtimes match - a file
+    written again (or restored with an older mtime) is compressed again, others are not read at all
+    A sibling that would not be smaller than the file is not written
+
+    :param stat: os.stat_result of the file if already known
+    :param encoders: dict suffix -> compress function, see sibling_encoders
+    :returns: CompressStats
+    '''
+    if stat is None:
+        stat = os.stat(path)
+    if encoders is None:
+        encoders = sibling_encoders()
+    stats = CompressStats()
+    data = None
+    for suffix, encode in encoders.items():
+        sibling_path = path + suffix
+        try:
+            if os.stat(sibling_path).st_mtime_ns == stat.st_mtime_ns:
+                stats.skipped_files += 1
+                continue
+        except FileNotFoundError:
+            pass
+        if data is None:
+            with open(path, "rb") as file:
+                data = file.read()
+        compressed = encode(data)
+        if len(compressed) >= len(data):
+            if os.path.exists(sibling_path):
+                os.remove(sibling_path)
+                stats.removed_files += 1
+            continue
+        tmp_path = sibling_path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(compressed)
+        os.utime(tmp_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        os.replace(tmp_path, sibling_path)
+        stats.written_files += 1
+        stats.saved_bytes += len(data) - len(compressed)
+    return stats
+
+
+def compress_tree(dir_path, manifest, workers=None):
+    '''
+    Docstring for compress_tree
+    Goal: precompress the build output, so the web server sends index.html.gz / .br as they are
+    instead of compressing every response again
+    The files are compressed in a thread pool (zlib and brotli release the GIL while compressing);
+    the siblings are recorded in the manifest, so the ones left from outputs that are gone (stale pages,
+    renamed assets) or of an encoding that is not written anymore (e.g. .br once brotli is not installed)
+    are deleted - a .gz shipped as a static file is never touched
+
+    :param dir_path: output directory of the build
+    :param manifest: BuildManifest
+    :param workers: number of compressing threads, one per core if None
+    :returns: CompressStats
+    '''
+    encoders = sibling_encoders()
+    index = ContentIndex(dir_path, dir_path)
+    todo = [entry for entry in index if os.path.splitext(entry.source)[1].lower() in compress_extensions
+            and entry.stat.st_size >= compress_min_size]
+    stats = CompressStats()
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as executor:
+        for file_stats in executor.map(lambda entry: compress_file(entry.source, entry.stat, encoders), todo):
+            stats.add(file_stats)
+    compressed = {}
+    for entry in todo:
+        for suffix in encoders:
+            if os.path.exists(entry.source + suffix):
+                compressed[entry.source + suffix] = entry.source
+    stats.removed_files += remove_siblings(manifest, compressed)
+    return stats
+
+
+def remove_siblings(manifest, keep=None):
+    '''
+    Docstring for remove_siblings
+    Goal: delete the siblings compress_tree wrote in earlier builds that are not in keep - every one of
+    them for a build without --precompress, the server would send them instead of the new outputs
+
+    :param keep: dict sibling path -> output path of the siblings of this build, recorded in the manifest
+    :returns: number of deleted siblings
+    '''
+    keep = keep if keep is not None else {}
+    removed = 0
+    for path in sorted(set(manifest.compressed) - set(keep)):
+        if os.path.isfile(path):
+            os.remove(path)
+            removed += 1
+    manifest.compressed = keep
+    return removed
@@ -0,0 +1,55 @@
+import os
+from collections import (namedtuple)
+
+# source: path of the file, dest: its output path, stat: os.stat_result from the crawl (st_size, st_mtime_ns, ...)
+IndexEntry = namedtuple("IndexEntry", ["source", "dest", "stat"])
+
+
+def page_filename(filename):
+    #index.md -> index.html, the naming pages always had
+    return filename.split(".")[0] + ".html"
+
+
+class ContentIndex():
+    '''
+    Every file of a source tree with its stat and output path, collected in one os.scandir walk
+    The walk needs no extra stat per entry (scandir knows the file type), and every later step
+    (page generation, static sync, the incremental checks) reads the stat from here
+
+    :param source_dir_path: directory to crawl
+    :param dest_dir_path: output directory the tree is mapped to
+    :param rename: optional function renaming the output file name, e.g. page_filename
+    '''
+    def __init__(self, source_dir_path, dest_dir_path, rename=None):
+        self.source_dir_path = source_dir_path
+        self.dest_dir_path = dest_dir_path
+        self.rename = rename
+        self.entries = []
+        #output directories, parents before children
+        self.dirs = [dest_dir_path]
+        self.scan(source_dir_path, dest_dir_path)
+
+    def scan(self, source_dir_path, dest_dir_path):
+        with os.scandir(source_dir_path) as dir_entries:
+            dir_entries = list(dir_entries)
+        for dir_entry in dir_entries:
+            dest_path = os.path.join(dest_dir_path, dir_entry.name)
+            if dir_entry.is_dir():
+                self.dirs.append(dest_path)
+                self.scan(dir_entry.path, dest_path)
+            elif dir_entry.is_file():
+                if self.rename is not None:
+                    dest_path = os.path.join(dest_dir_path, self.rename(dir_entry.name))
+                self.entries.append(IndexEntry(dir_entry.path, dest_path, dir_entry.stat()))
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def total_size(self):
+        return sum(entry.stat.st_size for entry in self.entries)
+
+    def __repr__(self):
+        return f"ContentIndex({self.source_dir_path}, {len(self.entries)} file(s), {self.total_size()} bytes)"
@@ -0,0 +1,111 @@
+import os
+
+from manifest import (hash_file)
+
+
+class OutputDedup():
+    '''
+    Content hash -> first output of the build with that content
+    An output with the same content as an earlier one becomes a hardlink to it: the output directory
+    (and a deploy artifact packing hardlinks once) holds the content once
+    Outputs are only ever replaced by a new name (os.replace), never written in place, so rewriting
+    one of the links later leaves the others as they were
+
+    Keep pages and static files in separate tables - a static output can be a hardlink of its source,
+    and a page must never share the inode of a file that is edited in place
+    '''
+    def __init__(self):
+        self.paths = {}
+        #seeded paths come from an earlier build, their content is checked before anything links to them
+        self.unverified = set()
+        self.linked_files = 0
+        self.duplicate_files = 0
+        self.saved_bytes = 0
+
+    def seed(self, digest, path):
+        #an output of an earlier build that is not written again, e.g. an unchanged page
+        if digest not in self.paths:
+            self.paths[digest] = path
+            self.unverified.add(path)
+
+    def claim(self, digest, path):
+        '''
+        Docstring for claim
+        Goal: find the earlier output with the same content, or make path the output of this content
+
+        :returns: path of the earlier identical output, None if there is none
+        '''
+        existing = self.paths.get(digest)
+        if existing is not None and existing in self.unverified:
+            self.unverified.discard(existing)
+            if not os.path.isfile(existing) or hash_file(existing) != digest:
+                existing = None
+        if existing is None or existing == path:
+            self.paths[digest] = path
+            return None
+        return existing
+
+    def link(self, existing, path, size):
+        '''
+        Docstring for link
+        Goal: replace the output at path with a hardlink to existing, in one step
+
+        :returns: False if hardlinks do not work there, the output is kept as it is then
+        '''
+        if os.path.lexists(path) and os.path.samefile(existing, path):
+            self.add_duplicate(size)
+            return True
+        #not the .tmp name, that one can hold the written output (see commit_output)
+        tmp_path = path + ".link.tmp"
+        try:
+            if os.path.lexists(tmp_path):
+                os.remove(tmp_path)
+            os.link(existing, tmp_path)
+            os.replace(tmp_path, path)
+        except OSError:
+            return False
+        self.linked_files += 1
+        self.add_duplicate(size)
+        return True
+
+    def commit_output(self, tmp_path, path, digest, size):
+        '''
+        Docstring for commit_output
+        Goal: put an output written under tmp_path into place - as a hardlink to the earlier output
+        with the same content if there is one, moved to path otherwise
+        Called by the writers of the file_io module, which hash the content as they write it
+
+        :param size: size of the output in bytes
+        '''
+        existing = self.claim(digest, path) if size > 0 else None
+        if existing is not None:
+            if self.link(existing, path, size):
+                os.remove(tmp_path)
+                return
+            self.paths[digest] = path
+        os.replace(tmp_path, path)
+
+    def add_duplicate(self, size):
+        self.duplicate_files += 1
+        self.saved_bytes += size
+
+    def add_output(self, path, digest=None):
+        '''
+        Docstring for add_output
+        Goal: deduplicate one output already in place, e.g. a page written by a worker process
+
+        :param digest: content hash of the output (see AtomicOutput.commit), hashed here if None
+        :returns: the content hash
+        '''
+        if digest is None:
+            digest = hash_file(path)
+        size = os.path.getsize(path)
+        if size > 0:
+            existing = self.claim(digest, path)
+            if existing is not None and not self.link(existing, path, size):
+                self.paths[digest] = path
+        return digest
+
+    def __repr__(self):
+        return (f"{self.duplicate_files} duplicate output(s) / {self.saved_bytes} bytes stored once "
+                f"({self.linked_files} hardlinked in this build)")
@@ -0,0 +1,191 @@
+import datetime
+import os
+import re
+from xml.sax.saxutils import (escape, quoteattr)
+
+from file_io import (DirectIO)
+from listings import (collect_posts, page_url)
+
+# the limit of one sitemap file, bigger sites get a sitemap index pointing to sitemap-1.xml, sitemap-2.xml, ...
+sitemap_max_urls = 50000
+sitemap_filename = "sitemap.xml"
+sitemap_part_pattern = re.compile(r"sitemap-\d+\.xml")
+feed_filename = "feed.xml"
+default_feed_entries = 20
+
+sitemap_namespace = "http://www.sitemaps.org/schemas/sitemap/0.9"
+atom_namespace = "http://www.w3.org/2005/Atom"
+xml_declaration = '<?xml version="1.0" encoding="UTF-8"?>\n'
+
+
+def absolute_url(site_url, basepath, url):
+    '''
+    Docstring for absolute_url
+    Goal: "/blog/tom/" -> "https://example.com/static_site_gen/blog/tom/"
+
+    :param site_url: scheme and host of the site, e.g. https://example.com
+    :param basepath: the basepath of the build
+    '''
+    return site_url.rstrip("/") + basepath + url[1:]
+
+
+def utc_timestamp(mtime_ns):
+    return datetime.datetime.fromtimestamp(mtime_ns / 1e9, datetime.timezone.utc)
+
+
+def page_mtime_ns(source, record):
+    #the stat recorded by the content index, stat the source only when it was not recorded
+    if "mtime_ns" in record:
+        return record["mtime_ns"]
+    try:
+        return os.stat(source).st_mtime_ns
+    except FileNotFoundError:
+        return os.stat(record["dest"]).st_mtime_ns
+
+
+def iter_sitemap_urls(manifest, dest_dir_path, site_url, basepath):
+    '''
+    Docstring for iter_sitemap_urls
+    Goal: every page and listing page of the build with its last modification date, from the manifest
+
+    :returns: generator of (absolute url, "YYYY-MM-DD" or None), sorted by url
+    '''
+    urls = []
+    for source, record in manifest.pages.items():
+        urls.append((page_url(record["dest"], dest_dir_path), source, record))
+    for dest in manifest.listings:
+        urls.append((page_url(dest, dest_dir_path), None, None))
+    urls.sort(key=lambda url: url[0])
+    for url, source, record in urls:
+        lastmod = None
+        if record is not None:
+            lastmod = utc_timestamp(page_mtime_ns(source, record)).strftime("%Y-%m-%d")
+        yield absolute_url(site_url, basepath, url), lastmod
+
+
+def write_sitemap(urls, dest_dir_path, site_url, basepath, max_urls=sitemap_max_urls):
+    '''
+    Docstring for write_sitemap
+    Goal: stream the urls into sitemap.xml, url by url
+    Past max_urls the urls go on in sitemap-2.xml, sitemap-3.xml, ... and sitemap.xml becomes
+    the sitemap index of all the parts
+
+    :param urls: iterable of (absolute url, lastmod or None), see iter_sitemap_urls
+    :returns: list of written file paths
+    '''
+    page_io = DirectIO()
+    parts = []
+    out = None
+    count = 0
+    for loc, lastmod in urls:
+        if out is None or count == max_urls:
+            if out is not None:
+                out.write("</urlset>\n")
+                out.commit()
+            parts.append(os.path.join(dest_dir_path, f"sitemap-{len(parts) + 1}.xml"))
+            out = page_io.open_output(parts[-1])
+            out.write(xml_declaration)
+            out.write(f'<urlset xmlns="{sitemap_namespace}">\n')
+            count = 0
+        out.write(f"<url><loc>{escape(loc)}</loc>")
+        if lastmod is not None:
+            out.write(f"<lastmod>{lastmod}</lastmod>")
+        out.write("</url>\n")
+        count += 1
+    if out is None:
+        parts.append(os.path.join(dest_dir_path, "sitemap-1.xml"))
+        out = page_io.open_output(parts[-1])
+        out.write(xml_declaration)
+        out.write(f'<urlset xmlns="{sitemap_namespace}">\n')
+    out.write("</urlset>\n")
+    out.commit()
+
+    sitemap_path = os.path.join(dest_dir_path, sitemap_filename)
+    if len(parts) == 1:
+        os.replace(parts[0], sitemap_path)
+        written = [sitemap_path]
+    else:
+        out = page_io.open_output(sitemap_path)
+        out.write(xml_declaration)
+        out.write(f'<sitemapindex xmlns="{sitemap_namespace}">\n')
+        for part in parts:
+            part_url = absolute_url(site_url, basepath, "/" + os.path.basename(part))
+            out.write(f"<sitemap><loc>{escape(part_url)}</loc></sitemap>\n")
+        out.write("</sitemapindex>\n")
+        out.commit()
+        written = [sitemap_path] + parts
+    #parts left from an earlier, bigger build
+    for filename in os.listdir(dest_dir_path):
+        path = os.path.join(dest_dir_path, filename)
+        if sitemap_part_pattern.fullmatch(filename) and path not in written:
+            os.remove(path)
+    return written
+
+
+def entry_updated(post, record):
+    #the front matter date if it is one, the mtime of the source otherwise
+    try:
+        date = datetime.datetime.strptime(post.date, "%Y-%m-%d").replace(tzinfo=datetime.timezone.utc)
+    except ValueError:
+        date = utc_timestamp(page_mtime_ns(post.source, record)).replace(microsecond=0)
+    return date.isoformat().replace("+00:00", "Z")
+
+
+def read_content(post, template):
+    #the content html of the already rendered page, None if it cannot be taken out of it
+    try:
+        with open(post.dest, "r") as file:
+            html = file.read()
+    except FileNotFoundError:
+        return None
+    return template.extract_content(html, post.title)
+
+
+def write_atom_feed(manifest, template, dest_dir_path, site_url, basepath, feed_title,
+                    max_entries=default_feed_entries):
+    '''
+    Docstring for write_atom_feed
+    Goal: stream the newest blog posts into feed.xml (Atom)
+    The entries come from the manifest, their content is cut out of the pages already written
+    to the output (see Template.extract_content) - no post is parsed or rendered again
+
+    :param template: the Template the pages were rendered with
+    :param feed_title: title of the feed
+    :param max_entries: number of newest posts in the feed
+    :returns: path of the feed
+    '''
+    posts = collect_posts(manifest, dest_dir_path)[:max_entries]
+    updated = [(entry_updated(post, manifest.pages[post.source]), post) for post in posts]
+    feed_url = absolute_url(site_url, basepath, "/" + feed_filename)
+    site_root = absolute_url(site_url, basepath, "/")
+
+    feed_path = os.path.join(dest_dir_path, feed_filename)
+    out = DirectIO().open_output(feed_path)
+    try:
+        out.write(xml_declaration)
+        #the content has site absolute links, xml:base makes them absolute for feed readers
+        out.write(f'<feed xmlns="{atom_namespace}" xml:base={quoteattr(site_root)}>\n')
+        out.write(f"<title>{escape(feed_title)}</title>\n")
+        out.write(f"<author><name>{escape(feed_title)}</name></author>\n")
+        out.write(f"<id>{escape(feed_url)}</id>\n")
+        out.write(f'<link rel="self" href={quoteattr(feed_url)} />\n')
+        out.write(f"<link href={quoteattr(site_root)} />\n")
+        newest = max((date for date, post in updated), default="1970-01-01T00:00:00Z")
+        out.write(f"<updated>{newest}</updated>\n")
+        for date, post in updated:
+            url = absolute_url(site_url, basepath, post.url)
+            out.write("<entry>")
+            out.write(f"<title>{escape(post.title)}</title>")
+            out.write(f"<id>{escape(url)}</id>")
+            out.write(f"<link href={quoteattr(url)} />")
+            out.write(f"<updated>{date}</updated>")
+            content = read_content(post, template)
+            if content is not None:
+                out.write(f'<content type="html">{escape(content)}</content>')
+            out.write("</entry>\n")
+        out.write("</feed>\n")
+    except BaseException:
+        out.abort()
+        raise
+    out.commit()
+    return feed_path
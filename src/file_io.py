@@ -0,0 +1,251 @@
+import hashlib
+import io
+import os
+import queue
+import threading
+from collections import (deque)
+from concurrent.futures import (ThreadPoolExecutor)
+from contextlib import (nullcontext)
+
+
+class AtomicOutput():
+    '''
+    Output file written under a temporary name and moved into place by commit()
+    abort() throws it away, so a failing page never leaves half a page behind
+    The content is hashed as it is written, the output is never read back for its hash
+
+    :param dedup: optional OutputDedup (see dedup module), an output with the content of an earlier one
+    becomes a hardlink to it on commit
+    '''
+    def __init__(self, dest_path, dedup=None):
+        self.dest_path = dest_path
+        self.tmp_path = dest_path + ".tmp"
+        self.dedup = dedup
+        self.hasher = hashlib.sha256()
+        self.size = 0
+        self.file = open(self.tmp_path, "wb")
+
+    def write(self, text):
+        data = text.encode()
+        self.hasher.update(data)
+        self.size += len(data)
+        self.file.write(data)
+
+    def commit(self):
+        '''
+        Docstring for commit
+        Goal: move the output into place (or hardlink it, with dedup)
+
+        :returns: content hash of the output
+        '''
+        self.file.close()
+        digest = self.hasher.hexdigest()
+        if self.dedup is not None:
+            self.dedup.commit_output(self.tmp_path, self.dest_path, digest, self.size)
+        else:
+            os.replace(self.tmp_path, self.dest_path)
+        return digest
+
+    def abort(self):
+        self.file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+class DirectIO():
+    '''
+    Plain blocking reads and writes
+    Every output directory is created once, not once per page
+
+    :param dirs_ready: the output directories were already created by the caller (e.g. by generate_pages before a pool build)
+    :param dedup: optional OutputDedup the outputs are committed through, see AtomicOutput
+    '''
+    def __init__(self, dirs_ready=False, dedup=None):
+        self.dirs_ready = dirs_ready
+        self.dedup = dedup
+        self.created_dirs = set()
+
+    def make_dirs(self, dest_path):
+        dir_path = os.path.dirname(dest_path)
+        if self.dirs_ready or dir_path == "" or dir_path in self.created_dirs:
+            return
+        os.makedirs(dir_path, exist_ok=True)
+        self.created_dirs.add(dir_path)
+
+    def schedule(self, paths):
+        #nothing to read ahead
+        pass
+
+    def read_lines(self, from_path):
+        '''
+        Docstring for read_lines
+        Goal: open the source for reading line by line
+
+        :returns: context manager giving an iterable of lines
+        '''
+        return open(from_path, "r")
+
+    def open_output(self, dest_path):
+        '''
+        Docstring for open_output
+        Goal: open the output for writing, call .commit() when done or .abort() on failure
+        commit() returns the content hash of the output
+        '''
+        self.make_dirs(dest_path)
+        return AtomicOutput(dest_path, self.dedup)
+
+    def close(self):
+        '''
+        Docstring for close
+        Goal: wait for every output to be on disk
+
+        :returns: dict dest_path -> exception of the outputs that failed to write
+        '''
+        return {}
+
+
+class QueuedOutput():
+    '''
+    Output whose writes are handed to the writer thread of BackgroundIO in chunks
+    The chunks are encoded and hashed here, the writer thread only writes bytes
+    '''
+    def __init__(self, background_io, dest_path, chunk_size):
+        self.background_io = background_io
+        self.dest_path = dest_path
+        self.chunk_size = chunk_size
+        self.parts = []
+        self.size = 0
+        self.hasher = hashlib.sha256()
+        self.written_bytes = 0
+
+    def write(self, text):
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if len(self.parts) > 0:
+            data = "".join(self.parts).encode()
+            self.hasher.update(data)
+            self.written_bytes += len(data)
+            self.background_io.queue.put(("write", self.dest_path, data))
+            self.parts = []
+            self.size = 0
+
+    def commit(self):
+        #the output is moved into place (or hardlinked) by the writer thread, see BackgroundIO.write_loop
+        self.flush()
+        digest = self.hasher.hexdigest()
+        self.background_io.queue.put(("commit", self.dest_path, (digest, self.written_bytes)))
+        return digest
+
+    def abort(self):
+        self.parts = []
+        self.background_io.queue.put(("abort", self.dest_path, None))
+
+
+class BackgroundIO(DirectIO):
+    '''
+    Overlaps disk latency with parsing:
+    - sources are read ahead on a pool of threads, a few pages before the parser needs them
+      (big sources are not prefetched, they are streamed line by line as usual)
+    - outputs are written by one background thread, fed in chunks through a bounded queue
+    Call close() at the end - it waits for the writes and closes every handle
+
+    :param read_workers: threads reading sources
+    :param read_ahead: number of sources read ahead of the parser
+    :param max_prefetch_size: sources bigger than this (bytes) are not prefetched
+    :param chunk_size: characters buffered per output before handing them to the writer
+    :param queue_size: chunks waiting for the writer before the parser has to wait
+    :param dedup: optional OutputDedup, used by the writer thread only
+    '''
+    def __init__(self, read_workers=4, read_ahead=16, max_prefetch_size=1024 * 1024,
+                 chunk_size=64 * 1024, queue_size=64, dedup=None):
+        super().__init__(dedup=dedup)
+        self.read_ahead = read_ahead
+        self.max_prefetch_size = max_prefetch_size
+        self.chunk_size = chunk_size
+        self.reader = ThreadPoolExecutor(max_workers=read_workers)
+        self.waiting_paths = deque()
+        self.prefetched = {}
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.errors = {}
+        self.writer = threading.Thread(target=self.write_loop, daemon=True)
+        self.writer.start()
+
+    def schedule(self, paths):
+        '''
+        Docstring for schedule
+        Goal: tell the order the sources will be read in, so they can be read ahead
+        '''
+        self.waiting_paths.extend(paths)
+        self.fill_read_ahead()
+
+    def fill_read_ahead(self):
+        while len(self.waiting_paths) > 0 and len(self.prefetched) < self.read_ahead:
+            path = self.waiting_paths.popleft()
+            self.prefetched[path] = self.reader.submit(self.prefetch, path)
+
+    def prefetch(self, path):
+        if os.path.getsize(path) > self.max_prefetch_size:
+            return None
+        with open(path, "r") as file:
+            return file.read()
+
+    def read_lines(self, from_path):
+        future = self.prefetched.pop(from_path, None)
+        self.fill_read_ahead()
+        if future is not None:
+            text = future.result()
+            if text is not None:
+                return nullcontext(io.StringIO(text))
+        return open(from_path, "r")
+
+    def open_output(self, dest_path):
+        self.make_dirs(dest_path)
+        return QueuedOutput(self, dest_path, self.chunk_size)
+
+    def write_loop(self):
+        files = {}
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            action, dest_path, data = item
+            if dest_path in self.errors:
+                continue
+            tmp_path = dest_path + ".tmp"
+            try:
+                if action == "write":
+                    if dest_path not in files:
+                        files[dest_path] = open(tmp_path, "wb")
+                    files[dest_path].write(data)
+                elif action == "commit":
+                    #an empty output never had a write
+                    file = files.pop(dest_path, None) or open(tmp_path, "wb")
+                    file.close()
+                    digest, size = data
+                    #commits come in the order of the pages, an earlier output is on disk before it is linked to
+                    if self.dedup is not None:
+                        self.dedup.commit_output(tmp_path, dest_path, digest, size)
+                    else:
+                        os.replace(tmp_path, dest_path)
+                else:
+                    file = files.pop(dest_path, None)
+                    if file is not None:
+                        file.close()
+                        os.remove(tmp_path)
+            except OSError as e:
+                self.errors[dest_path] = e
+                file = files.pop(dest_path, None)
+                if file is not None:
+                    file.close()
+        for file in files.values():
+            file.close()
+
+    def close(self):
+        self.queue.put(None)
+        self.writer.join()
+        self.reader.shutdown(wait=True, cancel_futures=True)
+        return self.errors
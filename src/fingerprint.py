@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+
+from file_io import (DirectIO)
+
+# assets that get a content hash in their name, pages and files like robots.txt keep theirs
+fingerprint_extensions = {".css", ".js", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".avif", ".ico",
+                          ".woff", ".woff2"}
+# hex digits of the sha256 in the file name
+fingerprint_length = 12
+# Netlify / Cloudflare Pages style headers file, other hosts ignore it
+headers_filename = "_headers"
+immutable_cache_control = "public, max-age=31536000, immutable"
+
+
+def fingerprint_path(path, digest):
+    '''
+    Docstring for fingerprint_path
+    Goal: images/tom.png -> images/tom.<hash>.png
+
+    :param digest: sha256 hex digest of the file
+    '''
+    root, extension = os.path.splitext(path)
+    return f"{root}.{digest[:fingerprint_length]}{extension}"
+
+
+def url_of(path, dir_path):
+    #./static/images/tom.png -> /images/tom.png
+    return "/" + os.path.relpath(path, dir_path).replace(os.sep, "/")
+
+
+def fingerprint_index(index, manifest):
+    '''
+    Docstring for fingerprint_index
+    Goal: give every fingerprintable asset of a static ContentIndex a content addressed output name
+    Every such entry gets a second entry with the output name.<hash>.ext, so syncing the index writes both;
+    the un-hashed output stays for what refers to the asset by name without going through the pages -
+    e.g. url(images/bg.png) in a stylesheet, which is not rewritten (it is a hardlink of the source as
+    long as hardlinks work, see sync_file). Outputs of older hashes are deleted by BuildManifest.prune_assets
+    Hashes are cached in the manifest by size and mtime (see BuildManifest.file_hash), so unchanged
+    assets are not read again
+
+    :param index: ContentIndex of the static directory (see content_index module), changed in place
+    :param manifest: BuildManifest
+    :returns: dict site url -> fingerprinted site url, e.g. "/index.css" -> "/index.0123456789ab.css",
+    for UrlRewriter (see template module)
+    '''
+    asset_urls = {}
+    entries = []
+    for entry in index:
+        if os.path.splitext(entry.source)[1].lower() not in fingerprint_extensions:
+            entries.append(entry)
+            continue
+        digest = manifest.file_hash(entry.source, entry.stat)
+        dest = fingerprint_path(entry.dest, digest)
+        asset_urls[url_of(entry.dest, index.dest_dir_path)] = url_of(dest, index.dest_dir_path)
+        entries.append(entry._replace(dest=dest))
+        entries.append(entry)
+    index.entries = entries
+    return asset_urls
+
+
+def asset_urls_digest(asset_urls):
+    #changes whenever any asset url does, every page refers to assets through it
+    return hashlib.sha256(json.dumps(asset_urls, sort_keys=True).encode()).hexdigest()
+
+
+def write_headers(asset_urls, dest_dir_path, basepath):
+    '''
+    Docstring for write_headers
+    Goal: tell the host that fingerprinted assets never change - a new content gets a new name
+
+    :returns: path of the headers file
+    '''
+    headers_path = os.path.join(dest_dir_path, headers_filename)
+    out = DirectIO().open_output(headers_path)
+    for url in sorted(asset_urls.values()):
+        out.write(f"{basepath}{url[1:]}\n  Cache-Control: {immutable_cache_control}\n")
+    out.commit()
+    return headers_path
+
+
+def remove_headers(dest_dir_path, manifest):
+    '''
+    Docstring for remove_headers
+    Goal: delete the headers file of an earlier --fingerprint-assets build - it would keep marking urls
+    immutable whose files are gone
+    A _headers file synced from the static directory is left alone
+
+    :returns: path of the deleted headers file, None if there was none
+    '''
+    headers_path = os.path.join(dest_dir_path, headers_filename)
+    if headers_path in manifest.assets or not os.path.isfile(headers_path):
+        return None
+    os.remove(headers_path)
+    return headers_path
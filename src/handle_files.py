@@ -1,20 +1,141 @@
+import io
 import os
 import shutil
 import re
-from block_markdown import (markdown_to_html_node)
+from concurrent.futures import (ProcessPoolExecutor, as_completed)
+from contextlib import (nullcontext)
+from block_markdown import (iter_blocks, block_to_html_node, blocks_to_html_node, page_tag, get_block_cache, set_block_cache)
+from profiler import (PageProfile)
+from manifest import (hash_file)
+from template import (load_template)
+from file_io import (DirectIO, BackgroundIO)
+from content_index import (ContentIndex, page_filename)
+from page_meta import (PageMeta, split_front_matter)
 
-def copy_files_recursive(source_dir_path, dest_dir_path):
-    if not os.path.exists(dest_dir_path):
-        os.mkdir(dest_dir_path)
+class SyncStats():
+    def __init__(self):
+        self.copied_files = 0
+        self.copied_bytes = 0
+        self.linked_files = 0
+        self.skipped_files = 0
+        self.skipped_bytes = 0
+        self.removed_files = 0
 
-    for filename in os.listdir(source_dir_path):
-        from_path = os.path.join(source_dir_path, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
-        print(f" * {from_path} -> {dest_path}")
-        if os.path.isfile(from_path):
-            shutil.copy(from_path, dest_path)
-        else:
-            copy_files_recursive(from_path, dest_path)
+    def __repr__(self):
+        return (f"copied {self.copied_files} file(s) / {self.copied_bytes} bytes "
+                f"({self.linked_files} hardlinked), skipped {self.skipped_files} unchanged file(s) / "
+                f"{self.skipped_bytes} bytes, removed {self.removed_files} stale file(s)")
+
+
+def sync_files_recursive(source_dir_path, dest_dir_path, manifest=None, use_hash=False, use_links=True, stats=None,
+                         dedup=None):
+    '''
+    Docstring for sync_files_recursive
+    Goal: copy the static files into the output, but only the files that changed since the last build
+    A file is unchanged when size and mtime match (and the content hash, with use_hash)
+    Changed files are hardlinked when possible (same filesystem), copied otherwise
+
+    :param manifest: optional BuildManifest, remembers the synced files so stale ones can be removed (see prune_assets)
+    :param use_hash: also compare content hashes, not only size and mtime
+    :param use_links: hardlink instead of copying when source and destination are on the same filesystem
+    :param stats: SyncStats to add to, a new one is created if None
+    :param dedup: optional OutputDedup (see dedup module), a file with the content of an earlier one
+    is hardlinked to that one's output
+    :returns: SyncStats
+    '''
+    index = ContentIndex(source_dir_path, dest_dir_path)
+    return sync_index(index, manifest, use_hash, use_links, stats, dedup)
+
+
+def sync_index(index, manifest=None, use_hash=False, use_links=True, stats=None, dedup=None):
+    '''
+    Docstring for sync_index
+    Goal: sync every file of a ContentIndex (see content_index module), see sync_files_recursive for the parameters
+    '''
+    if stats is None:
+        stats = SyncStats()
+    #parents come before children, one mkdir per directory
+    for dir_path in index.dirs:
+        try:
+            os.mkdir(dir_path)
+        except FileExistsError:
+            pass
+    for entry in index:
+        sync_file(entry.source, entry.dest, manifest, use_hash, use_links, stats, entry.stat, dedup)
+    return stats
+
+
+def sync_file(from_path, dest_path, manifest=None, use_hash=False, use_links=True, stats=None, from_stat=None,
+              dedup=None):
+    '''
+    Docstring for sync_file
+    Goal: sync a single static file, see sync_files_recursive for the parameters
+
+    :param from_stat: stat of from_path if already known (e.g. from a ContentIndex)
+    '''
+    if stats is None:
+        stats = SyncStats()
+    if manifest is not None:
+        manifest.record_asset(from_path, dest_path)
+
+    if from_stat is None:
+        from_stat = os.stat(from_path)
+    if dedup is not None and from_stat.st_size > 0:
+        #the manifest caches the hash by stat, an unchanged file is not read again
+        digest = manifest.file_hash(from_path, from_stat) if manifest is not None else hash_file(from_path)
+        existing = dedup.claim(digest, dest_path)
+        if existing is not None:
+            if os.path.lexists(dest_path) and os.path.samefile(existing, dest_path):
+                dedup.add_duplicate(from_stat.st_size)
+                stats.skipped_files += 1
+                stats.skipped_bytes += from_stat.st_size
+                return stats
+            if dedup.link(existing, dest_path, from_stat.st_size):
+                print(f" * {from_path} -> {dest_path} (same as {existing})")
+                stats.linked_files += 1
+                stats.copied_files += 1
+                stats.copied_bytes += from_stat.st_size
+                return stats
+    if is_file_unchanged(from_path, from_stat, dest_path, use_hash):
+        stats.skipped_files += 1
+        stats.skipped_bytes += from_stat.st_size
+        return stats
+
+    print(f" * {from_path} -> {dest_path}")
+    if os.path.lexists(dest_path):
+        os.remove(dest_path)
+    if use_links and link_file(from_path, dest_path):
+        stats.linked_files += 1
+    else:
+        #copy2 keeps the mtime, so the next build sees the file as unchanged
+        shutil.copy2(from_path, dest_path)
+    stats.copied_files += 1
+    stats.copied_bytes += from_stat.st_size
+    return stats
+
+
+def is_file_unchanged(from_path, from_stat, dest_path, use_hash):
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return False
+    #hardlinked by an earlier build - it is the very same file
+    if os.path.samestat(from_stat, dest_stat):
+        return True
+    if from_stat.st_size != dest_stat.st_size or from_stat.st_mtime_ns != dest_stat.st_mtime_ns:
+        return False
+    if use_hash:
+        return hash_file(from_path) == hash_file(dest_path)
+    return True
+
+
+def link_file(from_path, dest_path):
+    #hardlinks only work on the same filesystem (and not everywhere), False means copy instead
+    try:
+        os.link(from_path, dest_path)
+        return True
+    except OSError:
+        return False
 
 
 def extract_title(markdown):
@@ -37,44 +158,308 @@ def extract_title(markdown):
 
     return title[0].replace("#", "").strip()
 
-def generate_page(from_path, template_path, dest_path, basepath):
+class TitleFinder():
+    '''
+    Passes the blocks through and remembers the title of the first "# heading" block on the way,
+    so the title does not need another scan over the whole markdown
+
+    :param title: title already known (e.g. from the front matter), no heading is looked at then
+    '''
+    def __init__(self, blocks, title=None):
+        self.blocks = blocks
+        self.title = title
+
+    def __iter__(self):
+        for block in self.blocks:
+            if self.title is None and h1_pattern.match(block) is not None:
+                self.title = extract_title(block.split("\n", 1)[0])
+            yield block
+
+
+# same as in extract_title, but only at the start of a block
+h1_pattern = re.compile(r"#[ \t]")
+
+
+def generate_page(from_path, template_path, dest_path, basepath, template=None, profile=None, page_io=None):
+    '''
+    Docstring for generate_page
+    Goal: turn one markdown file into a html page
+    The title is the front matter "title", or the first h1 heading
+
+    :param template: Template compiled once per build (see template module), loaded from template_path if None
+    :param profile: optional PageProfile (see profiler module), every stage of the page is timed into it
+    :param page_io: DirectIO or BackgroundIO (see file_io module) reading the source and writing the page,
+    a new DirectIO if None
+    :returns: tuple (PageMeta of the page, see page_meta module, the profile)
+    '''
     print(f"generate_page * {from_path} {template_path} -> {dest_path}")
-    from_file = open(from_path, "r")
-    markdown_content = from_file.read()
-    from_file.close()
-
-    template_file = open(template_path, "r")
-    template = template_file.read()
-    template_file.close()
-
-    node = markdown_to_html_node(markdown_content)
-    html = node.to_html()
-
-    title = extract_title(markdown_content)
-    template = template.replace("{{ Title }}", title)
-    template = template.replace("{{ Content }}", html)
-    template = template.replace('href="/', 'href="' + basepath)
-    template = template.replace('src="/', 'src="' + basepath)
-
-    dest_dir_path = os.path.dirname(dest_path)
-    if dest_dir_path != "":
-        os.makedirs(dest_dir_path, exist_ok=True)
-    to_file = open(dest_path, "w")
-    to_file.write(template)
-
-def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath):
-    
-    #Crawl every entry in the content directory
-
-    if not os.path.exists(dest_dir_path):
-        os.mkdir(dest_dir_path)
-
-    for filename in os.listdir(dir_path_content):
-        new_filename = filename.split(".")[0] + ".html"
-        from_path = os.path.join(dir_path_content, filename)
-        dest_path = os.path.join(dest_dir_path, filename)
-        if os.path.isfile(from_path):
-            dest_path_html = os.path.join(dest_dir_path, new_filename)
-            generate_page(from_path, template_path, dest_path_html, basepath)
-        else:
-            generate_pages_recursive(from_path, template_path, dest_path, basepath)
\ No newline at end of file
+    stage = profile.stage if profile is not None else no_stage
+    if template is None:
+        template = load_template(template_path, basepath)
+    if page_io is None:
+        page_io = DirectIO()
+
+    #the output is written under a temporary name, so a failing page never leaves half a page behind
+    to_file = page_io.open_output(dest_path)
+    try:
+        with page_io.read_lines(from_path) as from_file:
+            metadata, lines = split_front_matter(from_file)
+            if profile is None and template.content_index is not None:
+                #pipelined: the file is read line by line, and every block is written as soon as it is parsed
+                blocks = TitleFinder(iter_blocks(lines), metadata.get("title"))
+                render_pipelined(to_file, template, blocks)
+                title = blocks.title
+            else:
+                title = render_page(to_file, template, lines, metadata.get("title"), stage, profile is not None)
+    except BaseException:
+        to_file.abort()
+        raise
+    output_hash = to_file.commit()
+    return PageMeta(title, metadata, output_hash), profile
+
+
+def render_page(to_file, template, lines, title, stage, profiled):
+    '''
+    Docstring for render_page
+    Goal: parse the whole page first, then write it - for profiling, and for a template without
+    exactly one {{ Content }} which can only be rendered whole
+
+    :param title: title from the front matter, None to take it from the first h1 heading
+    :returns: the title
+    '''
+    with stage("read"):
+        lines = list(lines)
+    with stage("block split"):
+        blocks = list(iter_blocks(lines))
+    with stage("inline parse"):
+        blocks = TitleFinder(blocks, title)
+        node = blocks_to_html_node(blocks)
+    if blocks.title is None:
+        raise Exception("There is no H1 header")
+    title = blocks.title
+
+    if not profiled:
+        template.render(to_file, title, node)
+        return title
+
+    #profiling keeps the stages apart, so the page is built in memory first
+    with stage("html serialize"):
+        html = node.to_html(template.rewriter.rewrite, template.minify, template.image_props)
+    with stage("template fill"):
+        page = io.StringIO()
+        template.render_html(page, title, html)
+        page = page.getvalue()
+    with stage("write"):
+        to_file.write(page)
+    return title
+
+
+def render_pipelined(to_file, template, blocks):
+    '''
+    Docstring for render_pipelined
+    Goal: write the template head, then each block's HTML as soon as the block is parsed, then the template tail
+    The head needs the title - blocks parsed before the title is found wait in memory (usually none,
+    the title is the first block)
+
+    :param to_file: file-like object opened for text
+    :param template: Template with exactly one {{ Content }}
+    :param blocks: TitleFinder over the blocks of the page
+    '''
+    rewrite_url = template.rewriter.rewrite
+    waiting = []
+    for block in blocks:
+        html_node = block_to_html_node(block)
+        if waiting is None:
+            html_node.write_html(to_file, rewrite_url, template.minify, template.image_props)
+            continue
+        waiting.append(html_node)
+        if blocks.title is not None:
+            write_page_start(to_file, template, blocks.title, waiting, rewrite_url)
+            waiting = None
+    if blocks.title is None:
+        raise Exception("There is no H1 header")
+    if waiting is not None:
+        #no blocks at all, the title came from the front matter
+        write_page_start(to_file, template, blocks.title, waiting, rewrite_url)
+    to_file.write(f"</{page_tag}>")
+    template.write_tail(to_file, blocks.title)
+
+
+def write_page_start(to_file, template, title, html_nodes, rewrite_url):
+    template.write_head(to_file, title)
+    to_file.write(f"<{page_tag}>")
+    for html_node in html_nodes:
+        html_node.write_html(to_file, rewrite_url, template.minify, template.image_props)
+
+
+def no_stage(name):
+    return nullcontext()
+
+
+def make_dirs(dest_paths):
+    '''
+    Docstring for make_dirs
+    Goal: create the directories of all the output paths, each directory once
+    '''
+    for dir_path in sorted(set(os.path.dirname(dest_path) for dest_path in dest_paths)):
+        if dir_path != "":
+            os.makedirs(dir_path, exist_ok=True)
+
+
+def page_dest_path(from_path, dir_path_content, dest_dir_path):
+    '''
+    Docstring for page_dest_path
+    Goal: the html output path of one markdown file, the same naming as collect_pages uses
+    '''
+    dir_path, filename = os.path.split(from_path)
+    return os.path.join(dest_dir_path + dir_path[len(dir_path_content):], page_filename(filename))
+
+
+def collect_pages(dir_path_content, dest_dir_path):
+    '''
+    Docstring for collect_pages
+    Goal: crawl every entry in the content directory and pair each markdown file with its html output
+
+    :returns: list of (from_path, dest_path) tuples
+    '''
+    return [(entry.source, entry.dest) for entry in ContentIndex(dir_path_content, dest_dir_path, page_filename)]
+
+
+class PageErrors(Exception):
+    '''
+    Pages that failed to generate, raised by generate_pages once every other page is done
+    Every page was still collected, so the outputs of deleted sources can be pruned after it
+    '''
+    def __init__(self, errors):
+        self.errors = sorted(errors, key=lambda error: error[0])
+        lines = [f" * {from_path}: {error}" for from_path, error in self.errors]
+        super().__init__(f"{len(self.errors)} page(s) failed to generate:\n" + "\n".join(lines))
+
+
+def generate_pages(pages, template_path, basepath, manifest=None, jobs=1, profile=None, io_threads=4, asset_urls=None,
+                   minify=False, images=None, dedup=None):
+    '''
+    Docstring for generate_pages
+    Goal: generate every (from_path, dest_path) page, one by one or on a pool of processes
+    Errors do not stop the build - they are gathered and raised together at the end (PageErrors);
+    any other exception means not every page was collected
+
+    :param pages: list of (from_path, dest_path) tuples (see collect_pages), or IndexEntry tuples
+    from a ContentIndex - their stat lets the manifest skip hashing unchanged sources
+    :param manifest: optional BuildManifest, only pages whose inputs changed are generated
+    :param jobs: number of worker processes, 1 generates in this process
+    :param profile: optional BuildProfile (see profiler module), gets a PageProfile of every generated page
+    :param io_threads: threads reading sources ahead of the parser when generating in this process,
+    outputs are then written by a background thread too (0 = plain blocking reads and writes)
+    :param asset_urls: optional dict of fingerprinted asset urls (see fingerprint module) links are rewritten to
+    :param minify: write minified html, see compile_template
+    :param images: optional dict of image sizes and variants for the img tags, see compile_template
+    :param dedup: optional OutputDedup (see dedup module), a page with the same html as another one
+    becomes a hardlink to it
+    :returns: number of generated pages
+    '''
+    #pick the stale pages first, hashing stays in this process next to the manifest
+    todo = []
+    errors = []
+    for page in pages:
+        from_path, dest_path = page[0], page[1]
+        stat = page[2] if len(page) > 2 else None
+        digest = None
+        if manifest is not None:
+            try:
+                is_current, digest = manifest.check_page(from_path, dest_path, stat)
+            except OSError as e:
+                #e.g. an unreadable source - the page is still seen, its output is not pruned
+                errors.append((from_path, e))
+                continue
+            if is_current:
+                output_hash = manifest.pages[from_path].get("output_hash")
+                if dedup is not None and output_hash is not None:
+                    dedup.seed(output_hash, dest_path)
+                continue
+        todo.append((from_path, dest_path, digest, stat))
+
+    template = load_template(template_path, basepath, asset_urls, minify, images)
+    done = []
+    if jobs > 1 and len(todo) > 1:
+        #every output directory is created once here, the workers only write files
+        #(and hash them - the outputs are deduplicated here, where the hashes of the whole build are)
+        make_dirs([page[1] for page in todo])
+        page_io = DirectIO(dirs_ready=True)
+        #every worker starts with a copy of this process' block cache
+        with ProcessPoolExecutor(max_workers=jobs, initializer=set_block_cache,
+                                 initargs=(get_block_cache(),)) as executor:
+            futures = {}
+            for page in todo:
+                page_profile = PageProfile(page[0]) if profile is not None else None
+                future = executor.submit(generate_page, page[0], template_path, page[1], basepath, template,
+                                         page_profile, page_io)
+                futures[future] = page
+            for future in as_completed(futures):
+                page = futures[future]
+                try:
+                    #the worker times into its own copy of the profile and sends it back
+                    page_meta, page_profile = future.result()
+                    if profile is not None:
+                        profile.add(page_profile)
+                    if dedup is not None:
+                        dedup.add_output(page[1], page_meta.output_hash)
+                    done.append(page + (page_meta,))
+                except Exception as e:
+                    errors.append((page[0], e))
+    else:
+        #parsing one page overlaps with reading the next ones and writing the previous ones
+        #the writers hash the pages and link the duplicates as they commit them
+        page_io = BackgroundIO(read_workers=io_threads, dedup=dedup) if io_threads > 0 else DirectIO(dedup=dedup)
+        page_io.schedule([page[0] for page in todo])
+        try:
+            for page in todo:
+                try:
+                    page_profile = PageProfile(page[0]) if profile is not None else None
+                    page_meta, page_profile = generate_page(page[0], template_path, page[1], basepath, template,
+                                                            page_profile, page_io)
+                    if profile is not None:
+                        profile.add(page_profile)
+                    done.append(page + (page_meta,))
+                except Exception as e:
+                    errors.append((page[0], e))
+        finally:
+            write_errors = page_io.close()
+        #a page is only done once it is on disk
+        for page in [page for page in done if page[1] in write_errors]:
+            done.remove(page)
+            errors.append((page[0], write_errors[page[1]]))
+
+    if manifest is not None:
+        for from_path, dest_path, digest, stat, page_meta in done:
+            output_hash = page_meta.output_hash if dedup is not None else None
+            manifest.record_page(from_path, dest_path, digest, stat, page_meta.to_dict(), output_hash)
+
+    if len(errors) > 0:
+        if manifest is not None:
+            #a failed page must be generated again next build, even if the environment is saved meanwhile
+            for from_path, error in errors:
+                manifest.pages.pop(from_path, None)
+        raise PageErrors(errors)
+    return len(done)
+
+
+def generate_pages_recursive(dir_path_content, template_path, dest_dir_path, basepath, manifest=None, jobs=1, profile=None,
+                             io_threads=4, asset_urls=None, minify=False, images=None, dedup=None):
+    '''
+    Docstring for generate_pages_recursive
+    Goal: crawl every entry in the content directory and generate the html pages
+    With a manifest only pages whose inputs changed are generated again
+
+    :param manifest: optional BuildManifest from the manifest module
+    :param jobs: number of worker processes, see generate_pages
+    :param profile: optional BuildProfile, see generate_pages
+    :param io_threads: see generate_pages
+    :param asset_urls: see generate_pages
+    :param minify: see generate_pages
+    :param images: see generate_pages
+    :param dedup: see generate_pages
+    '''
+    pages = ContentIndex(dir_path_content, dest_dir_path, page_filename)
+    return generate_pages(pages, template_path, basepath, manifest, jobs, profile, io_threads, asset_urls, minify,
+                          images, dedup)
@@ -1,4 +1,62 @@
+# props holding a url, these go through rewrite_url when serializing
+url_props = ("href", "src")
+# the prop the url slot of a LeafNode is written as
+leaf_url_props = {"a": "href", "img": "src"}
+
+# end tags minified html leaves out: the element ends at a next sibling with one of these tags,
+# or at the end of its parent (see omit_end_tag)
+optional_end_tags = {
+    "li": {"li"},
+    "p": {"address", "article", "aside", "blockquote", "details", "div", "dl", "fieldset", "figcaption", "figure",
+          "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "hgroup", "hr", "main", "menu", "nav",
+          "ol", "p", "pre", "section", "table", "ul"},
+}
+# a p does not end with one of these parents, its end tag has to stay
+p_keep_end_parents = {"a", "audio", "del", "ins", "map", "noscript", "video"}
+# elements without content and without an end tag
+void_tags = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+def escape_text(text):
+    '''
+    Docstring for escape_text
+    Goal: escape &, < and > of a text, once per text node
+    Most text has none of them: three scans in C and the same string back, no new string built
+    '''
+    if "&" not in text and "<" not in text and ">" not in text:
+        return text
+    #a chain of str.replace beats str.translate and html.escape here (see bench_escape)
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def escape_attribute(value):
+    #props are written in double quotes, so & and " are the ones to escape
+    if "&" not in value and '"' not in value:
+        return value
+    return value.replace("&", "&amp;").replace('"', "&quot;")
+
+
+def omit_end_tag(tag, next_sibling=None, parent_tag=None):
+    '''
+    Docstring for omit_end_tag
+    Goal: tell if minified html can leave out the end tag of an element (the optional end tags of the html spec)
+
+    :param next_sibling: HTMLNode after the element, None if the element is the last child
+    :param parent_tag: tag of the parent, None for a node serialized on its own - it is taken for a block
+    of the page, followed by another block or by the end of the page
+    '''
+    closing_tags = optional_end_tags.get(tag)
+    if closing_tags is None:
+        return False
+    if next_sibling is None:
+        return tag != "p" or parent_tag not in p_keep_end_parents
+    return next_sibling.tag in closing_tags
+
+
 class HTMLNode():
+    #no per instance __dict__ - a big page has hundreds of thousands of nodes
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -7,43 +65,177 @@ class HTMLNode():
 
     def to_html(self):
         raise NotImplementedError
+
+    def iter_html(self, rewrite_url=None, minify=False, image_props=None):
+        '''
+        Docstring for iter_html
+        Goal: stream the HTML as fragments, instead of building one big string
+        "".join(node.iter_html()) is the same as node.to_html()
+
+        :param rewrite_url: optional function applied to every href/src value, e.g. to add the basepath
+        :param minify: leave out optional end tags and the end tags of void elements, text is written as it is
+        :param image_props: optional function src -> dict of props added to the img tag (or None),
+        e.g. width and height from the images module
+        '''
+        yield self.to_html(rewrite_url, minify, image_props=image_props)
+
+    def write_html(self, out, rewrite_url=None, minify=False, image_props=None):
+        '''
+        Docstring for write_html
+        Goal: write the HTML fragment by fragment into a file-like sink (anything with .write)
+
+        :param out: file-like object opened for text
+        :param rewrite_url: see iter_html
+        :param minify: see iter_html
+        :param image_props: see iter_html
+        '''
+        write = out.write
+        for fragment in self.iter_html(rewrite_url, minify, image_props):
+            write(fragment)
     
-    def props_to_html(self):
+    def props_to_html(self, rewrite_url=None):
         if self.props == None or self.props == {}:
             return ""
-        return ' ' + ' '.join([f'{k}="{v}"' for k, v in self.props.items()])
+        if rewrite_url is None:
+            return ' ' + ' '.join([f'{k}="{escape_attribute(v)}"' for k, v in self.props.items()])
+        parts = []
+        for k, v in self.props.items():
+            if k in url_props:
+                v = rewrite_url(v)
+            parts.append(f'{k}="{escape_attribute(v)}"')
+        return ' ' + ' '.join(parts)
     
     def __repr__(self):
         return f"HTMLNode({self.tag}, {self.value}, children: {self.children}, {self.props})"
     
 class LeafNode(HTMLNode):
-    def __init__(self, tag, value, props=None):
+    '''
+    :param url: href of an a, src of an img - kept in a slot instead of a props dict per link/image,
+    the attribute is only built when serializing (see props_to_html)
+    :param alt: alt text of an img
+    '''
+    __slots__ = ("url", "alt")
+
+    def __init__(self, tag, value, props=None, url=None, alt=None):
         super().__init__(tag, value, None, props)
+        self.url = url
+        self.alt = alt
 
-    def to_html(self):
+    def props_to_html(self, rewrite_url=None):
+        props_html = super().props_to_html(rewrite_url)
+        if self.url is None:
+            return props_html
+        url = rewrite_url(self.url) if rewrite_url is not None else self.url
+        url_html = f' {leaf_url_props[self.tag]}="{escape_attribute(url)}"'
+        if self.alt is not None:
+            url_html += f' alt="{escape_attribute(self.alt)}"'
+        return url_html + props_html
+
+    def src(self):
+        #src of an img, from the url slot or from the props
+        if self.url is not None:
+            return self.url
+        return self.props.get("src") if self.props is not None else None
+
+    def to_html(self, rewrite_url=None, minify=False, omit_end=None, image_props=None):
+        '''
+        Docstring for to_html
+        Goal: the HTML of the leaf, see HTMLNode.iter_html
+
+        :param omit_end: with minify, leave out the end tag - decided by the parent, None decides it for
+        a leaf on its own (see omit_end_tag)
+        '''
         if self.value is None:
             raise ValueError("invalid HTML: no value")
+        value = escape_text(self.value)
         if self.tag is None:
-            return self.value
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+            return value
+        props_html = self.props_to_html(rewrite_url)
+        if image_props is not None and self.tag == "img":
+            src = self.src()
+            extra_props = image_props(src) if src is not None else None
+            if extra_props is not None:
+                own_props = self.props if self.props is not None else {}
+                props_html += "".join(f' {k}="{escape_attribute(v)}"' for k, v in extra_props.items()
+                                      if k not in own_props)
+        if minify:
+            if self.tag in void_tags and value == "":
+                return f"<{self.tag}{props_html}>"
+            if omit_end is None:
+                omit_end = omit_end_tag(self.tag)
+            if omit_end:
+                return f"<{self.tag}{props_html}>{value}"
+        return f"<{self.tag}{props_html}>{value}</{self.tag}>"
 
     def __repr__(self):
+        if self.url is not None:
+            return f"LeafNode({self.tag}, {self.value}, {self.props}, {self.url}, {self.alt})"
         return f"LeafNode({self.tag}, {self.value}, {self.props})"
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
 
-    def to_html(self):
+    def to_html(self, rewrite_url=None, minify=False, image_props=None):
+        return "".join(self.iter_html(rewrite_url, minify, image_props))
+
+    def check(self):
         if self.tag is None:
             raise ValueError("invalid HTML: no tag")
         if self.children is None:
             raise ValueError("invalid HTML: no children")
-        children_html = ""
-        for child in self.children:
-            children_html += child.to_html()
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+
+    def iter_html(self, rewrite_url=None, minify=False, image_props=None):
+        #walk the tree with our own stack of (node, children iterator) - no recursion,
+        #and no children_html string built at every level
+        if minify:
+            yield from self.iter_minified_html(rewrite_url, image_props)
+            return
+        self.check()
+        yield f"<{self.tag}{self.props_to_html(rewrite_url)}>"
+        stack = [(self, iter(self.children))]
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                yield f"</{node.tag}>"
+            elif isinstance(child, ParentNode):
+                child.check()
+                yield f"<{child.tag}{child.props_to_html(rewrite_url)}>"
+                stack.append((child, iter(child.children)))
+            else:
+                yield from child.iter_html(rewrite_url, False, image_props)
+
+    def iter_minified_html(self, rewrite_url=None, image_props=None):
+        #the same walk, but every end tag needs the next sibling, so the stack holds
+        #[node, index of the next child, omit the end tag of node]
+        self.check()
+        yield f"<{self.tag}{self.props_to_html(rewrite_url)}>"
+        stack = [[self, 0, omit_end_tag(self.tag)]]
+        while stack:
+            top = stack[-1]
+            node, index, omit_end = top
+            children = node.children
+            if index == len(children):
+                stack.pop()
+                if not omit_end:
+                    yield f"</{node.tag}>"
+                continue
+            top[1] = index + 1
+            child = children[index]
+            next_sibling = children[index + 1] if index + 1 < len(children) else None
+            if isinstance(child, ParentNode):
+                child.check()
+                yield f"<{child.tag}{child.props_to_html(rewrite_url)}>"
+                stack.append([child, 0, omit_end_tag(child.tag, next_sibling, node.tag)])
+            elif isinstance(child, LeafNode):
+                yield child.to_html(rewrite_url, True, omit_end_tag(child.tag, next_sibling, node.tag), image_props)
+            else:
+                yield from child.iter_html(rewrite_url, True, image_props)
 
     def __repr__(self):
         return f"ParentNode({self.tag}, children: {self.children}, {self.props})"
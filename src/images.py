@@ -0,0 +1,231 @@
+import hashlib
+import json
+import os
+import struct
+from concurrent.futures import (ProcessPoolExecutor)
+
+from fingerprint import (url_of)
+
+try:
+    from PIL import Image
+except ImportError:
+    #without Pillow images get their width and height, but no resized variants
+    Image = None
+
+image_extensions = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
+# widths of the resized variants, only the ones smaller than the image are made
+default_variant_widths = (480, 960, 1440)
+variant_hash_length = 12
+webp_quality = 80
+
+# jpeg markers of the frames that hold the image size
+jpeg_sof_markers = {0xc0, 0xc1, 0xc2, 0xc3, 0xc5, 0xc6, 0xc7, 0xc9, 0xca, 0xcb, 0xcd, 0xce, 0xcf}
+
+
+class ImageInfo():
+    '''
+    What the pages need to know of one image: its size and its resized variants
+
+    :param variants: list of (site url, width) of the WebP variants, smallest first
+    '''
+    def __init__(self, width, height, variants=None):
+        self.width = width
+        self.height = height
+        self.variants = variants if variants is not None else []
+
+    def props(self, rewrite_url=None):
+        '''
+        Docstring for props
+        Goal: the props added to the img tag of the image
+
+        :param rewrite_url: applied to the variant urls, see HTMLNode.iter_html
+        '''
+        props = {"width": str(self.width), "height": str(self.height), "loading": "lazy"}
+        if len(self.variants) > 0:
+            srcset = []
+            for url, width in self.variants:
+                srcset.append(f"{rewrite_url(url) if rewrite_url is not None else url} {width}w")
+            props["srcset"] = ", ".join(srcset)
+            props["sizes"] = f"(max-width: {self.width}px) 100vw, {self.width}px"
+        return props
+
+    def to_list(self):
+        return [self.width, self.height, self.variants]
+
+    def __eq__(self, other):
+        return isinstance(other, ImageInfo) and self.to_list() == other.to_list()
+
+    def __repr__(self):
+        return f"ImageInfo({self.width}x{self.height}, {len(self.variants)} variant(s))"
+
+
+def jpeg_size(file):
+    #walk the segments up to the first frame header
+    file.seek(2)
+    while True:
+        marker = file.read(2)
+        if len(marker) < 2 or marker[0] != 0xff:
+            return None
+        if marker[1] in (0x01, 0xff) or 0xd0 <= marker[1] <= 0xd7:
+            continue
+        length = file.read(2)
+        if len(length) < 2:
+            return None
+        length = struct.unpack(">H", length)[0]
+        if marker[1] in jpeg_sof_markers:
+            data = file.read(5)
+            if len(data) < 5:
+                return None
+            height, width = struct.unpack(">HH", data[1:5])
+            return width, height
+        file.seek(length - 2, os.SEEK_CUR)
+
+
+def image_size(path):
+    '''
+    Docstring for image_size
+    Goal: width and height of a png, gif, jpeg or webp image from its header - no image library needed
+
+    :returns: tuple (width, height), None for a format it does not know
+    '''
+    with open(path, "rb") as file:
+        head = file.read(30)
+        if head.startswith(b"\x89PNG\r\n\x1a\n") and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24])
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10])
+        if head[:4] == b"RIFF" and head[8:12] == b"WEBP" and len(head) == 30:
+            chunk = head[12:16]
+            if chunk == b"VP8X":
+                return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+            if chunk == b"VP8 ":
+                width, height = struct.unpack("<HH", head[26:30])
+                return width & 0x3fff, height & 0x3fff
+            if chunk == b"VP8L":
+                bits = int.from_bytes(head[21:25], "little")
+                return (bits & 0x3fff) + 1, ((bits >> 14) & 0x3fff) + 1
+            return None
+        if head[:2] == b"\xff\xd8":
+            return jpeg_size(file)
+    return None
+
+
+def variant_path(dest_path, digest, width):
+    #images/tom.png -> images/tom.<hash>.480w.webp, a new content gets new names
+    root = os.path.splitext(dest_path)[0]
+    return f"{root}.{digest[:variant_hash_length]}.{width}w.webp"
+
+
+def process_image(source, dest_path, digest, widths=default_variant_widths):
+    '''
+    Docstring for process_image
+    Goal: measure one image and, with Pillow, write its resized WebP variants next to its output
+    Runs in the worker processes of process_images
+
+    :param dest_path: output path of the image itself
+    :param digest: content hash of the image, part of the variant names
+    :returns: record for BuildManifest.images, None if the image size cannot be read
+    '''
+    size = image_size(source)
+    if size is None:
+        return None
+    width, height = size
+    variants = []
+    if Image is not None:
+        variant_widths = sorted(set(w for w in widths if w < width) | {width})
+        with Image.open(source) as image:
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA")
+            for variant_width in variant_widths:
+                path = variant_path(dest_path, digest, variant_width)
+                variants.append([path, variant_width])
+                if os.path.exists(path):
+                    continue
+                resized = image
+                if variant_width != width:
+                    resized = image.resize((variant_width, max(1, round(height * variant_width / width))),
+                                           Image.LANCZOS)
+                tmp_path = path + ".tmp"
+                resized.save(tmp_path, "WEBP", quality=webp_quality)
+                os.replace(tmp_path, path)
+    return {"hash": digest, "width": width, "height": height, "variants": variants}
+
+
+def record_is_current(record, digest):
+    #same content, and the variants made with Pillow (if any) are all still there
+    if record is None or record["hash"] != digest:
+        return False
+    if Image is not None and len(record["variants"]) == 0:
+        return False
+    return all(os.path.exists(path) for path, width in record["variants"])
+
+
+def remove_variants(record, keep=()):
+    for path, width in record["variants"]:
+        if path not in keep and os.path.exists(path):
+            os.remove(path)
+
+
+def process_images(index, manifest, widths=default_variant_widths, workers=None):
+    '''
+    Docstring for process_images
+    Goal: size and resized WebP variants of every image of the static files, for the img tags of the pages
+    Images are cached in the manifest by content hash - an unchanged image is not opened again,
+    changed ones are processed on a pool of processes; variants of changed or removed images are deleted
+
+    :param index: ContentIndex of the static directory (see content_index module), synced to the output
+    :param manifest: BuildManifest
+    :param widths: widths of the resized variants
+    :param workers: number of worker processes, one per core if None
+    :returns: dict site url -> ImageInfo, e.g. "/images/tom.png" -> ImageInfo(800, 600, ...)
+    '''
+    records = {}
+    todo = []
+    seen = set()
+    for entry in index:
+        #with --fingerprint-assets a source has two entries (see fingerprint_index), it is processed once
+        if os.path.splitext(entry.source)[1].lower() not in image_extensions or entry.source in seen:
+            continue
+        seen.add(entry.source)
+        digest = manifest.file_hash(entry.source, entry.stat)
+        record = manifest.images.get(entry.source)
+        if record_is_current(record, digest):
+            records[entry.source] = (entry, record)
+        else:
+            #named after the source, not after a fingerprinted output name
+            dest_path = os.path.join(index.dest_dir_path, os.path.relpath(entry.source, index.source_dir_path))
+            todo.append((entry, dest_path, digest))
+
+    if len(todo) > 0:
+        #the variants go next to the output of the image
+        for dir_path in sorted(set(os.path.dirname(dest_path) for entry, dest_path, digest in todo)):
+            os.makedirs(dir_path, exist_ok=True)
+        if Image is None or len(todo) == 1:
+            #only headers to read, or one image - not worth starting processes
+            results = [process_image(entry.source, dest_path, digest, widths) for entry, dest_path, digest in todo]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(process_image, [entry.source for entry, dest_path, digest in todo],
+                                            [dest_path for entry, dest_path, digest in todo],
+                                            [digest for entry, dest_path, digest in todo],
+                                            [widths] * len(todo)))
+        for (entry, dest_path, digest), record in zip(todo, results):
+            if record is not None:
+                records[entry.source] = (entry, record)
+
+    for source, old_record in manifest.images.items():
+        new_record = records.get(source, (None, {"variants": []}))[1]
+        remove_variants(old_record, set(path for path, width in new_record["variants"]))
+    manifest.images = {source: record for source, (entry, record) in records.items()}
+
+    images = {}
+    for entry, record in records.values():
+        variants = [(url_of(path, index.dest_dir_path), width) for path, width in record["variants"]]
+        images[url_of(entry.source, index.source_dir_path)] = ImageInfo(record["width"], record["height"], variants)
+    return images
+
+
+def images_digest(images):
+    #changes whenever the size or the variants of any image do, pages show them in their img tags
+    data = {url: info.to_list() for url, info in images.items()}
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
@@ -0,0 +1,216 @@
+import hashlib
+import json
+import os
+import re
+
+from file_io import (DirectIO)
+from htmlnode import (LeafNode, ParentNode)
+from block_markdown import (page_tag)
+
+# posts are the pages under <public>/blog/, their listings go to /blog/, /blog/page/2/, ...
+blog_dir_name = "blog"
+# one archive per tag: /tags/<tag>/, /tags/<tag>/page/2/, ...
+tags_dir_name = "tags"
+default_posts_per_page = 10
+
+tag_slug_pattern = re.compile(r"[^a-z0-9]+")
+
+
+class Post():
+    '''
+    One blog post as a listing shows it, built from the page record in the build manifest
+    '''
+    def __init__(self, source, dest, url, title, date="", tags=None):
+        self.source = source
+        self.dest = dest
+        self.url = url
+        self.title = title
+        self.date = date
+        self.tags = tags if tags is not None else []
+
+    def entry(self):
+        #what a listing shows of the post
+        return [self.url, self.title, self.date]
+
+    def __repr__(self):
+        return f"Post({self.url}, {self.title}, {self.date}, {self.tags})"
+
+
+class Listing():
+    '''
+    One listing page: its posts and the links to the newer and older pages
+    signature() changes exactly when the rendered page would
+    '''
+    def __init__(self, dest, url, title, posts, newer_url=None, older_url=None):
+        self.dest = dest
+        self.url = url
+        self.title = title
+        self.posts = posts
+        self.newer_url = newer_url
+        self.older_url = older_url
+
+    def signature(self):
+        data = [self.title, self.newer_url, self.older_url, [post.entry() for post in self.posts]]
+        return hashlib.sha256(json.dumps(data).encode()).hexdigest()
+
+    def to_html_node(self):
+        items = []
+        for post in self.posts:
+            children = [LeafNode("a", post.title, {"href": post.url})]
+            if post.date != "":
+                children.append(LeafNode(None, " "))
+                children.append(LeafNode("time", post.date))
+            items.append(ParentNode("li", children))
+        children = [LeafNode("h1", self.title)]
+        if len(items) > 0:
+            children.append(ParentNode("ul", items))
+        links = []
+        if self.newer_url is not None:
+            links.append(LeafNode("a", "Newer posts", {"href": self.newer_url}))
+        if self.older_url is not None:
+            links.append(LeafNode("a", "Older posts", {"href": self.older_url}))
+        if len(links) > 0:
+            children.append(ParentNode("nav", links))
+        return ParentNode(page_tag, children)
+
+    def __repr__(self):
+        return f"Listing({self.url}, {len(self.posts)} post(s))"
+
+
+def page_url(dest_path, dest_dir_path):
+    '''
+    Docstring for page_url
+    Goal: site absolute url of an output file, an index.html is linked by its directory
+    '''
+    path = os.path.relpath(dest_path, dest_dir_path).replace(os.sep, "/")
+    if path == "index.html":
+        return "/"
+    if path.endswith("/index.html"):
+        return "/" + path[:-len("index.html")]
+    return "/" + path
+
+
+def tag_slug(tag):
+    return tag_slug_pattern.sub("-", tag.lower()).strip("-")
+
+
+def split_tags(tags):
+    #"Tolkien, books" -> ["Tolkien", "books"]
+    return [tag.strip() for tag in tags.split(",") if tag.strip() != ""]
+
+
+def collect_posts(manifest, dest_dir_path):
+    '''
+    Docstring for collect_posts
+    Goal: every post of the blog from the page records of the manifest - no source is read again
+
+    :returns: list of Post, newest first (posts without a date last, by title)
+    '''
+    blog_dir_path = os.path.join(dest_dir_path, blog_dir_name) + os.sep
+    #a hand written blog index is not a post
+    blog_index_path = blog_dir_path + "index.html"
+    posts = []
+    for source, record in manifest.pages.items():
+        meta = record.get("meta")
+        if meta is None or not record["dest"].startswith(blog_dir_path) or record["dest"] == blog_index_path:
+            continue
+        metadata = meta.get("metadata", {})
+        posts.append(Post(source, record["dest"], page_url(record["dest"], dest_dir_path), meta.get("title"),
+                          metadata.get("date", ""), split_tags(metadata.get("tags", ""))))
+    #stable sorts: by title first, then newest date first
+    posts.sort(key=lambda post: (post.title, post.url))
+    posts.sort(key=lambda post: post.date, reverse=True)
+    return posts
+
+
+def paginate(posts, dest_dir_path, url_parts, title, posts_per_page):
+    '''
+    Docstring for paginate
+    Goal: split posts into listing pages /<url_parts>/, /<url_parts>/page/2/, ...
+
+    :param url_parts: list of url path parts of the first page, e.g. ["tags", "books"]
+    :returns: list of Listing
+    '''
+    chunks = [posts[i:i + posts_per_page] for i in range(0, len(posts), posts_per_page)] or [[]]
+    urls = []
+    for number in range(1, len(chunks) + 1):
+        parts = url_parts if number == 1 else url_parts + ["page", str(number)]
+        urls.append("/" + "".join(part + "/" for part in parts))
+    listings = []
+    for i, chunk in enumerate(chunks):
+        dest = os.path.join(dest_dir_path, *urls[i].strip("/").split("/"), "index.html")
+        page_title = title if i == 0 else f"{title} - page {i + 1}"
+        newer_url = urls[i - 1] if i > 0 else None
+        older_url = urls[i + 1] if i + 1 < len(urls) else None
+        listings.append(Listing(dest, urls[i], page_title, chunk, newer_url, older_url))
+    return listings
+
+
+def plan_listings(posts, dest_dir_path, posts_per_page=default_posts_per_page):
+    '''
+    Docstring for plan_listings
+    Goal: every listing page of the blog - the blog index and one archive per tag, paginated
+
+    :param posts: list of Post in listing order, see collect_posts
+    :returns: list of Listing
+    '''
+    listings = paginate(posts, dest_dir_path, [blog_dir_name], "Blog", posts_per_page)
+    tags = {}
+    for post in posts:
+        for tag in post.tags:
+            slug = tag_slug(tag)
+            if slug == "":
+                continue
+            if slug not in tags:
+                tags[slug] = (tag, [])
+            tags[slug][1].append(post)
+    for slug in sorted(tags):
+        tag, tag_posts = tags[slug]
+        listings.extend(paginate(tag_posts, dest_dir_path, [tags_dir_name, slug], f"Posts tagged {tag}",
+                                 posts_per_page))
+    return listings
+
+
+def generate_listings(manifest, template, dest_dir_path, posts_per_page=default_posts_per_page, prune=True):
+    '''
+    Docstring for generate_listings
+    Goal: write the blog index and the tag archives from the page metadata in the manifest
+    Only listing pages whose content changed are written (see Listing.signature), so one changed post
+    rewrites the few pages it shows up on, not every listing; stale listing pages are deleted
+    A page written by hand (a content page with the same output) wins over the generated listing
+
+    :param manifest: BuildManifest with the page records of this build (after generate_pages and prune)
+    :param template: Template from the template module
+    :param prune: delete the stale listing pages, False when not every page was collected
+    :returns: tuple (number of written listing pages, number of unchanged ones)
+    '''
+    posts = collect_posts(manifest, dest_dir_path)
+    #no posts, no blog index
+    listings = plan_listings(posts, dest_dir_path, posts_per_page) if len(posts) > 0 else []
+    page_dests = set(record["dest"] for record in manifest.pages.values())
+    page_io = DirectIO()
+    written = 0
+    unchanged = 0
+    for listing in listings:
+        if listing.dest in page_dests:
+            #forget it without deleting, the output is the hand written page now
+            manifest.listings.pop(listing.dest, None)
+            continue
+        signature = listing.signature()
+        if manifest.check_listing(listing.dest, signature):
+            unchanged += 1
+            continue
+        print(f"generate_listing * {listing.url} -> {listing.dest}")
+        to_file = page_io.open_output(listing.dest)
+        try:
+            template.render(to_file, listing.title, listing.to_html_node())
+        except BaseException:
+            to_file.abort()
+            raise
+        to_file.commit()
+        manifest.record_listing(listing.dest, signature)
+        written += 1
+    if prune:
+        for dest in manifest.prune_listings():
+            print(f"Deleted stale listing {dest}")
+    return written, unchanged
@@ -1,30 +1,313 @@
+import argparse
+import cProfile
 import os
 import shutil
 import sys
 
-from handle_files import (copy_files_recursive, generate_pages_recursive)
+from block_cache import (BlockCache)
+from block_markdown import (set_block_cache)
+from compress import (compress_tree, remove_siblings)
+from content_index import (ContentIndex)
+from dedup import (OutputDedup)
+from fingerprint import (fingerprint_index, asset_urls_digest, write_headers, remove_headers)
+from images import (process_images, images_digest)
+from handle_files import (sync_index, sync_file, generate_pages, generate_pages_recursive, page_dest_path, PageErrors)
+from listings import (generate_listings, default_posts_per_page)
+from feeds import (iter_sitemap_urls, write_sitemap, write_atom_feed, default_feed_entries)
+from manifest import (BuildManifest, hash_file, hash_generator_code)
+from profiler import (BuildProfile)
+from template import (load_template)
+from watch import (serve, watch)
 
 dir_path_static = "./static"
 dir_path_public = "./docs"
 dir_path_content = "./content"
 template_path = "./template.html"
+manifest_path = "./.build_manifest.json"
+block_cache_path = "./.block_cache.pickle"
 default_basepath = "/"
+default_port = 8888
 
 
-def main():
-    basepath = default_basepath
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Generate the static site into ./docs")
+    parser.add_argument("basepath", nargs="?", default=default_basepath,
+                        help="prefix for absolute href/src links, e.g. /static_site_gen/")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="number of worker processes used to generate pages (0 = all cores)")
+    parser.add_argument("--io-threads", type=int, default=4,
+                        help="threads reading pages ahead of the parser without --jobs (0 = plain blocking file I/O)")
+    parser.add_argument("--hash-assets", action="store_true",
+                        help="compare static files by content hash too, not only by size and mtime")
+    parser.add_argument("--no-hardlinks", action="store_true",
+                        help="always copy static files instead of hardlinking them")
+    parser.add_argument("--dedup-outputs", action="store_true",
+                        help="hardlink outputs with the same content as an earlier one (pages to pages, static files to static files)")
+    parser.add_argument("--fingerprint-assets", action="store_true",
+                        help="write assets as name.<hash>.ext and link pages to those, so they can be cached forever")
+    parser.add_argument("--responsive-images", action="store_true",
+                        help="give img tags width, height and loading=lazy, and with Pillow a srcset of resized WebP variants")
+    parser.add_argument("--minify", action="store_true",
+                        help="write minified html: no template indentation, no optional end tags")
+    parser.add_argument("--precompress", action="store_true",
+                        help="write .gz (and .br with the brotli package) next to every html/css/js output")
+    parser.add_argument("--watch", action="store_true",
+                        help="after the build, keep rebuilding what changes in content, static and the template")
+    parser.add_argument("--serve", action="store_true",
+                        help="serve ./docs over http while watching (implies --watch)")
+    parser.add_argument("--port", type=int, default=default_port,
+                        help="port for --serve")
+    parser.add_argument("--block-cache", type=int, default=10000,
+                        help="number of parsed blocks kept in memory for reuse across pages (0 = off)")
+    parser.add_argument("--persist-block-cache", action="store_true",
+                        help=f"keep the block cache between builds in {block_cache_path}")
+    parser.add_argument("--no-listings", action="store_true",
+                        help="do not generate the blog index and the tag archives")
+    parser.add_argument("--posts-per-page", type=int, default=default_posts_per_page,
+                        help="posts on one page of the blog index and the tag archives")
+    parser.add_argument("--site-url",
+                        help="scheme and host the site is published on, e.g. https://example.github.io - "
+                             "sitemap.xml and feed.xml are only written with it")
+    parser.add_argument("--feed-entries", type=int, default=default_feed_entries,
+                        help="number of newest blog posts in feed.xml")
+    parser.add_argument("--profile", action="store_true",
+                        help="time every stage of every page and print the slowest pages")
+    parser.add_argument("--profile-top", type=int, default=10,
+                        help="number of slowest pages printed by --profile")
+    parser.add_argument("--profile-output",
+                        help="also run the build under cProfile and dump the pstats into this file")
+    args = parser.parse_args(argv)
+    if args.jobs <= 0:
+        args.jobs = os.cpu_count() or 1
+    return args
+
+
+def load_manifest(args):
+    '''
+    Docstring for load_manifest
+    Goal: load the manifest of the last build (the output directory is deleted if there is none)
+    and scan the static files - with --fingerprint-assets
+    the asset urls are part of the environment, a changed asset changes the links of every page,
+    and so are the image sizes with --responsive-images
 
-    print("Deleting public directory...")
-    if os.path.exists(dir_path_public):
+    :returns: tuple (BuildManifest, ContentIndex of the static files, fingerprinted asset urls or None,
+    processed images or None)
+    '''
+    manifest = BuildManifest(manifest_path).load()
+    if not manifest.loaded and os.path.exists(dir_path_public):
+        #nothing tells which files of the output an earlier build wrote (fresh clone, CI), so prune
+        #could never delete the outputs of removed pages - start from an empty output this once
+        print("No build manifest, deleting public directory...")
         shutil.rmtree(dir_path_public)
+    static_index = ContentIndex(dir_path_static, dir_path_public)
+    asset_urls = None
+    images = None
+    environment = {
+        "generator": hash_generator_code(),
+        "template": hash_file(template_path),
+        "basepath": args.basepath,
+    }
+    if args.minify:
+        environment["minify"] = True
+    if args.fingerprint_assets:
+        asset_urls = fingerprint_index(static_index, manifest)
+        environment["assets"] = asset_urls_digest(asset_urls)
+    if args.responsive_images:
+        images = process_images(static_index, manifest)
+        environment["images"] = images_digest(images)
+    manifest.keep_file_hashes([entry.source for entry in static_index])
+    manifest.set_environment(environment)
+    return manifest, static_index, asset_urls, images
+
+
+def build(args, loaded=None):
+    '''
+    Docstring for build
+    Goal: full (but incremental) build - sync the static files and generate the stale pages
 
-    print("Copying static files to public directory...")
-    copy_files_recursive(dir_path_static, dir_path_public)
+    :param loaded: what load_manifest returned if the caller loaded it already (see rebuild_changes)
+    :returns: True if every page was generated
+    '''
+    if loaded is None:
+        print("Loading build manifest...")
+        loaded = load_manifest(args)
+    manifest, static_index, asset_urls, images = loaded
+    if manifest.environment_changed:
+        print("Generator, template, options or assets changed, every page will be generated")
+
+    #pages and static files never share an inode, see OutputDedup
+    asset_dedup = OutputDedup() if args.dedup_outputs else None
+    page_dedup = OutputDedup() if args.dedup_outputs else None
+
+    print("Syncing static files to public directory...")
+    stats = sync_index(static_index, manifest, use_hash=args.hash_assets, use_links=not args.no_hardlinks,
+                       dedup=asset_dedup)
+    for dest_path in manifest.prune_assets():
+        print(f"Deleted stale static file {dest_path}")
+        stats.removed_files += 1
+    print(f"Static files: {stats}")
+    if images is not None:
+        print(f"Images: {len(images)} measured, {sum(len(info.variants) for info in images.values())} variant(s)")
+    if asset_urls is not None:
+        print(f"Fingerprinted {len(asset_urls)} asset(s), cache headers in {write_headers(asset_urls, dir_path_public, args.basepath)}")
+    else:
+        headers_path = remove_headers(dir_path_public, manifest)
+        if headers_path is not None:
+            print(f"Deleted {headers_path} of an earlier --fingerprint-assets build")
+
+    block_cache = None
+    if args.block_cache > 0:
+        block_cache = BlockCache(args.block_cache)
+        if args.persist_block_cache:
+            block_cache.load(block_cache_path, manifest.environment["generator"])
+    set_block_cache(block_cache)
 
     print("Generating page...")
-    generate_pages_recursive(dir_path_content,template_path,dir_path_public, basepath)
+    profile = BuildProfile() if args.profile else None
+    failed = False
+    #only when every page was collected the pages not seen are gone, and their outputs can be deleted
+    collected = True
+    try:
+        generated = generate_pages_recursive(dir_path_content, template_path, dir_path_public, args.basepath,
+                                             manifest, args.jobs, profile, args.io_threads, asset_urls,
+                                             args.minify, images, page_dedup)
+        print(f"Generated {generated} page(s)")
+    except PageErrors as e:
+        print(e)
+        failed = True
+    except Exception as e:
+        print(e)
+        failed = True
+        collected = False
+    if profile is not None:
+        profile.report(args.profile_top)
+    if block_cache is not None:
+        #with --jobs the workers parse with their own copies, only this process' statistics are known
+        print(f"Block cache: {block_cache}")
+        if args.persist_block_cache and block_cache.misses > 0:
+            block_cache.save(block_cache_path, manifest.environment["generator"])
+
+    if args.dedup_outputs:
+        print(f"Deduplicated static files: {asset_dedup}")
+        print(f"Deduplicated pages: {page_dedup}")
+
+    if collected:
+        for dest_path in manifest.prune():
+            print(f"Deleted stale page {dest_path}")
+    else:
+        print("Not every page was collected, stale pages and listings are kept")
+    update_indexes(args, manifest, asset_urls, images, collected)
+    if args.precompress:
+        print(f"Precompressed output: {compress_tree(dir_path_public, manifest)}")
+    else:
+        removed = remove_siblings(manifest)
+        if removed > 0:
+            print(f"Deleted {removed} compressed file(s) of an earlier --precompress build")
+    #pages that did generate are kept in the manifest, even if others failed
+    manifest.save()
+    return not failed
+
+
+def update_indexes(args, manifest, asset_urls=None, images=None, prune=True):
+    '''
+    Docstring for update_indexes
+    Goal: the pages built from the page records in the manifest - blog listings, sitemap.xml and feed.xml
+
+    :param prune: delete listing pages that are not generated anymore, see generate_listings
+    '''
+    template = load_template(template_path, args.basepath, asset_urls, args.minify, images)
+    if not args.no_listings:
+        written, unchanged = generate_listings(manifest, template, dir_path_public, args.posts_per_page, prune)
+        print(f"Listings: {written} written, {unchanged} unchanged")
+    if args.site_url is None:
+        return
+    urls = iter_sitemap_urls(manifest, dir_path_public, args.site_url, args.basepath)
+    for path in write_sitemap(urls, dir_path_public, args.site_url, args.basepath):
+        print(f"Wrote {path}")
+    home = manifest.page_meta(os.path.join(dir_path_content, "index.md"))
+    feed_title = home["title"] if home is not None else "Blog"
+    feed_path = write_atom_feed(manifest, template, dir_path_public, args.site_url, args.basepath, feed_title,
+                                args.feed_entries)
+    print(f"Wrote {feed_path}")
+
+
+def rebuild_changes(args, changed, removed):
+    '''
+    Docstring for rebuild_changes
+    Goal: partial rebuild for the watch mode
+    - a changed page is generated again, a removed one has its output deleted
+    - a changed static file is synced, a removed one has its output deleted
+    - a changed environment re-renders every page (full build): the template, the generator code,
+      the options, a fingerprinted asset url (--fingerprint-assets) or an image (--responsive-images)
+
+    :param changed: changed or new file paths, from watch.diff_snapshots
+    :param removed: removed file paths
+    '''
+    if template_path in removed:
+        #e.g. an editor replacing the file - the next change brings it back
+        print("Template removed, nothing to build until it is back")
+        return
+    loaded = load_manifest(args)
+    manifest, static_index, asset_urls, images = loaded
+    if manifest.environment_changed:
+        #every page depends on the environment, the few changed paths are not enough
+        build(args, loaded)
+        return
+    pages = []
+    for path in changed:
+        if path.startswith(dir_path_content + os.sep):
+            pages.append((path, page_dest_path(path, dir_path_content, dir_path_public)))
+        elif path.startswith(dir_path_static + os.sep):
+            dest_path = dir_path_public + path[len(dir_path_static):]
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            sync_file(path, dest_path, manifest, args.hash_assets, not args.no_hardlinks)
+    for path in removed:
+        if path.startswith(dir_path_content + os.sep):
+            dest_path = manifest.remove_page(path)
+        elif path.startswith(dir_path_static + os.sep):
+            dest_path = manifest.remove_asset(dir_path_public + path[len(dir_path_static):])
+        else:
+            continue
+        if dest_path is not None:
+            print(f"Deleted {dest_path}")
+    try:
+        generate_pages(pages, template_path, args.basepath, manifest, io_threads=args.io_threads,
+                       asset_urls=asset_urls, minify=args.minify, images=images,
+                       dedup=OutputDedup() if args.dedup_outputs else None)
+    except Exception as e:
+        print(e)
+    update_indexes(args, manifest, asset_urls, images)
+    if args.precompress:
+        print(f"Precompressed output: {compress_tree(dir_path_public, manifest)}")
+    else:
+        remove_siblings(manifest)
+    manifest.save()
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    if args.profile_output:
+        #cProfile only sees this process, use --jobs 1 to profile the page generation too
+        profiler = cProfile.Profile()
+        ok = profiler.runcall(build, args)
+        profiler.dump_stats(args.profile_output)
+        print(f"cProfile stats written to {args.profile_output}, read them with: python3 -m pstats {args.profile_output}")
+    else:
+        ok = build(args)
+    if not args.watch and not args.serve:
+        if not ok:
+            sys.exit(1)
+        return
+
+    if args.serve:
+        serve(dir_path_public, args.port)
+        print(f"Serving {dir_path_public} on http://localhost:{args.port}{args.basepath}")
+    print("Watching for changes, Ctrl+C to stop...")
+    try:
+        watch([dir_path_content, dir_path_static, template_path],
+              lambda changed, removed: rebuild_changes(args, changed, removed))
+    except KeyboardInterrupt:
+        pass
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
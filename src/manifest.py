@@ -0,0 +1,293 @@
+import hashlib
+import json
+import os
+import time
+
+# sources modified less than this long ago are never trusted by size and mtime alone
+racy_ns = 2 * 1000 * 1000 * 1000
+
+
+def hash_file(path):
+    '''
+    Docstring for hash_file
+    Goal: return the sha256 hex digest of the file, read in chunks so big files are not loaded at once
+
+    :param path: path to the file
+    '''
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_generator_code(src_dir_path=None):
+    '''
+    Docstring for hash_generator_code
+    Goal: hash the generator's own code, so changing the generator rebuilds every page
+    Tests and benchmarks are skipped - they do not change the output
+
+    :param src_dir_path: directory with the generator modules, defaults to this module's directory
+    '''
+    if src_dir_path is None:
+        src_dir_path = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for filename in sorted(os.listdir(src_dir_path)):
+        if not filename.endswith(".py") or filename.startswith(("test_", "bench_")):
+            continue
+        digest.update(filename.encode())
+        digest.update(hash_file(os.path.join(src_dir_path, filename)).encode())
+    return digest.hexdigest()
+
+
+class BuildManifest():
+    '''
+    Persistent record of the last build, stored as JSON:
+    - environment: everything that affects every page (generator code, template, basepath)
+    - pages: source path -> {"hash": hash of the source, "dest": output path, "size", "mtime_ns": stat of the source,
+      "meta": title and front matter of the page, "output_hash": hash of the output with --dedup-outputs}
+    - assets: output path -> source path of the static files synced into the output
+    - listings: output path -> signature of the generated listing pages (see listings module)
+    - file_hashes: path -> {"hash", "size", "mtime_ns"}, content hashes cached by stat (see file_hash)
+    - images: source path -> {"hash", "width", "height", "variants": [[output path, width], ...]} of the
+      processed images (see images module)
+    - compressed: path of a .gz / .br sibling written by --precompress -> path of its output (see compress module)
+    '''
+    def __init__(self, path):
+        self.path = path
+        self.environment = {}
+        self.pages = {}
+        self.assets = {}
+        self.listings = {}
+        self.file_hashes = {}
+        self.images = {}
+        self.compressed = {}
+        self.environment_changed = True
+        #False without a manifest of an earlier build (fresh clone, CI, broken file)
+        self.loaded = False
+        self.seen = set()
+        self.seen_assets = set()
+        self.seen_listings = set()
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return self
+        with open(self.path, "r") as file:
+            try:
+                data = json.load(file)
+            except ValueError:
+                #broken manifest is the same as no manifest - everything gets rebuilt
+                return self
+        self.environment = data.get("environment", {})
+        self.pages = data.get("pages", {})
+        self.assets = data.get("assets", {})
+        self.listings = data.get("listings", {})
+        self.file_hashes = data.get("file_hashes", {})
+        self.images = data.get("images", {})
+        self.compressed = data.get("compressed", {})
+        self.loaded = True
+        return self
+
+    def save(self):
+        data = {"environment": self.environment, "pages": self.pages, "assets": self.assets, "listings": self.listings,
+                "file_hashes": self.file_hashes, "images": self.images, "compressed": self.compressed}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(data, file, indent=1, sort_keys=True)
+        #replace in one step, so an interrupted build never leaves half a manifest
+        os.replace(tmp_path, self.path)
+
+    def set_environment(self, environment):
+        '''
+        Docstring for set_environment
+        Goal: remember the build environment, if it differs from the last build every page is stale
+
+        :param environment: dict of hashes/values that affect every page
+        '''
+        self.environment_changed = environment != self.environment
+        self.environment = environment
+
+    def check_page(self, source, dest, stat=None):
+        '''
+        Docstring for check_page
+        Goal: tell if the page has to be generated again
+        A source with the size and mtime of the last build is not hashed again
+
+        :param source: path of the markdown file
+        :param dest: path of the html output
+        :param stat: os.stat_result of the source if already known (e.g. from a ContentIndex)
+        :returns: tuple (is_current, digest), digest should be passed to record_page after generating
+        '''
+        self.seen.add(source)
+        record = self.pages.get(source)
+        if self.environment_changed or record is None or record["dest"] != dest:
+            return False, hash_file(source)
+        if not os.path.exists(dest):
+            return False, hash_file(source)
+        if stat is None:
+            stat = os.stat(source)
+        if record.get("size") == stat.st_size and record.get("mtime_ns") == stat.st_mtime_ns:
+            return True, record["hash"]
+        digest = hash_file(source)
+        if record["hash"] != digest:
+            return False, digest
+        #only touched - remember the new mtime, so the next build does not hash it again
+        self.record_page(source, dest, digest, stat, record.get("meta"), record.get("output_hash"))
+        return True, digest
+
+    def record_page(self, source, dest, digest, stat=None, meta=None, output_hash=None):
+        '''
+        Docstring for record_page
+        Goal: remember a generated page
+
+        :param digest: from check_page
+        :param stat: optional os.stat_result of the source, see check_page
+        :param meta: optional dict of the page metadata (PageMeta.to_dict from the page_meta module)
+        :param output_hash: optional content hash of the output, see dedup module
+        '''
+        self.seen.add(source)
+        record = {"hash": digest, "dest": dest}
+        if meta is not None:
+            record["meta"] = meta
+        if output_hash is not None:
+            record["output_hash"] = output_hash
+        #a file modified within the mtime resolution of this build could change again without a new mtime,
+        #such a file is hashed again next time (like git's racy index entries)
+        if stat is not None and time.time_ns() - stat.st_mtime_ns > racy_ns:
+            record["size"] = stat.st_size
+            record["mtime_ns"] = stat.st_mtime_ns
+        self.pages[source] = record
+
+    def page_meta(self, source):
+        '''
+        Docstring for page_meta
+        Goal: metadata of a page from the last time it was generated, without reading the source
+
+        :returns: dict (see PageMeta.from_dict) or None
+        '''
+        record = self.pages.get(source)
+        if record is None:
+            return None
+        return record.get("meta")
+
+    def prune(self):
+        '''
+        Docstring for prune
+        Goal: delete outputs whose source is gone, instead of wiping the whole output directory
+
+        :returns: list of deleted output paths
+        '''
+        removed = []
+        for source in sorted(set(self.pages) - self.seen):
+            dest = self.pages.pop(source)["dest"]
+            if os.path.isfile(dest):
+                os.remove(dest)
+                removed.append(dest)
+                remove_empty_dirs(os.path.dirname(dest))
+        return removed
+
+    def remove_page(self, source):
+        '''
+        Docstring for remove_page
+        Goal: forget one page whose source was deleted and delete its output
+
+        :returns: deleted output path or None
+        '''
+        record = self.pages.pop(source, None)
+        if record is None or not os.path.isfile(record["dest"]):
+            return None
+        os.remove(record["dest"])
+        remove_empty_dirs(os.path.dirname(record["dest"]))
+        return record["dest"]
+
+    def remove_asset(self, dest):
+        source = self.assets.pop(dest, None)
+        if source is None or not os.path.isfile(dest):
+            return None
+        os.remove(dest)
+        remove_empty_dirs(os.path.dirname(dest))
+        return dest
+
+    def record_asset(self, source, dest):
+        self.seen_assets.add(dest)
+        self.assets[dest] = source
+
+    def prune_assets(self):
+        '''
+        Docstring for prune_assets
+        Goal: delete synced static files whose source is gone
+
+        :returns: list of deleted output paths
+        '''
+        removed = []
+        for dest in sorted(set(self.assets) - self.seen_assets):
+            del self.assets[dest]
+            if os.path.isfile(dest):
+                os.remove(dest)
+                removed.append(dest)
+                remove_empty_dirs(os.path.dirname(dest))
+        return removed
+
+    def file_hash(self, path, stat=None):
+        '''
+        Docstring for file_hash
+        Goal: hash_file, but a file with the size and mtime it had when it was last hashed is not read again
+        (same racy mtime rule as record_page)
+
+        :param stat: os.stat_result of the file if already known
+        '''
+        if stat is None:
+            stat = os.stat(path)
+        cached = self.file_hashes.get(path)
+        if cached is not None and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+            return cached["hash"]
+        digest = hash_file(path)
+        if time.time_ns() - stat.st_mtime_ns > racy_ns:
+            self.file_hashes[path] = {"hash": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        else:
+            self.file_hashes.pop(path, None)
+        return digest
+
+    def keep_file_hashes(self, paths):
+        #forget the cached hashes of files that are gone
+        paths = set(paths)
+        self.file_hashes = {path: cached for path, cached in self.file_hashes.items() if path in paths}
+
+    def check_listing(self, dest, signature):
+        '''
+        Docstring for check_listing
+        Goal: tell if a listing page is still current - same signature as last time and the output is there
+
+        :returns: True if it does not need to be written again
+        '''
+        self.seen_listings.add(dest)
+        if self.environment_changed or self.listings.get(dest) != signature:
+            return False
+        return os.path.exists(dest)
+
+    def record_listing(self, dest, signature):
+        self.seen_listings.add(dest)
+        self.listings[dest] = signature
+
+    def prune_listings(self):
+        '''
+        Docstring for prune_listings
+        Goal: delete listing pages that are not generated anymore (fewer pages, a tag that is gone)
+
+        :returns: list of deleted output paths
+        '''
+        removed = []
+        for dest in sorted(set(self.listings) - self.seen_listings):
+            del self.listings[dest]
+            if os.path.isfile(dest):
+                os.remove(dest)
+                removed.append(dest)
+                remove_empty_dirs(os.path.dirname(dest))
+        return removed
+
+
+def remove_empty_dirs(dir_path):
+    #walk up and remove directories left empty after deleting an output
+    while dir_path != "" and os.path.isdir(dir_path) and len(os.listdir(dir_path)) == 0:
+        os.rmdir(dir_path)
+        dir_path = os.path.dirname(dir_path)
@@ -0,0 +1,74 @@
+import itertools
+
+front_matter_delimiter = "---"
+
+
+class PageMeta():
+    '''
+    What the rest of the build needs to know about a page without reading its source again:
+    the title and the front matter metadata
+    It is stored with the page in the build manifest (see to_dict / from_dict)
+
+    :param output_hash: content hash of the written html, kept by the manifest apart from the meta
+    '''
+    def __init__(self, title=None, metadata=None, output_hash=None):
+        self.title = title
+        self.metadata = metadata if metadata is not None else {}
+        self.output_hash = output_hash
+
+    def get(self, key, default=None):
+        return self.metadata.get(key, default)
+
+    def to_dict(self):
+        return {"title": self.title, "metadata": self.metadata}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("title"), dict(data.get("metadata", {})))
+
+    def __eq__(self, other):
+        return isinstance(other, PageMeta) and self.title == other.title and self.metadata == other.metadata
+
+    def __repr__(self):
+        return f"PageMeta({self.title}, {self.metadata})"
+
+
+def split_front_matter(lines):
+    '''
+    Docstring for split_front_matter
+    Goal: take the front matter off the start of the page, the rest of the lines are left for the block split
+    Front matter is a block of "key: value" lines between two --- lines, the very first line of the page
+    has to be ---, e.g.
+    ---
+    date: 2025-01-31
+    tags: tolkien, books
+    ---
+    Only the front matter lines are read here, so it works on a file read line by line too
+    A page starting with --- that is not followed by "key: value" lines and a closing --- (e.g. a
+    thematic break, or a first paragraph of dashes) has no front matter - its lines are kept as they are
+
+    :param lines: iterable of lines, with or without line endings
+    :returns: tuple (metadata dict with lower case keys, iterator over the remaining lines)
+    '''
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return {}, lines
+    if first.rstrip("\r\n") != front_matter_delimiter:
+        return {}, itertools.chain([first], lines)
+
+    metadata = {}
+    #the lines read so far, given back if this is not front matter after all
+    read = [first]
+    for line in lines:
+        read.append(line)
+        line = line.rstrip("\r\n")
+        if line.strip() == front_matter_delimiter:
+            return metadata, lines
+        if line.strip() == "":
+            continue
+        key, separator, value = line.partition(":")
+        if separator == "" or key.strip() == "":
+            break
+        metadata[key.strip().lower()] = value.strip()
+    return {}, itertools.chain(read, lines)
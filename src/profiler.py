@@ -0,0 +1,78 @@
+import sys
+import time
+from contextlib import contextmanager
+
+# stages of generate_page, in order
+page_stages = ["read", "block split", "inline parse", "html serialize", "template fill", "write"]
+
+
+class PageProfile():
+    '''
+    Wall time and allocated memory blocks of every stage of one page
+    allocations is the net change of sys.getallocatedblocks() - cheap, no tracing needed
+    '''
+    def __init__(self, path):
+        self.path = path
+        self.timings = {}
+        self.allocations = {}
+
+    @contextmanager
+    def stage(self, name):
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+            self.allocations[name] = self.allocations.get(name, 0) + sys.getallocatedblocks() - blocks
+
+    def total(self):
+        return sum(self.timings.values())
+
+    def __repr__(self):
+        return f"PageProfile({self.path}, {self.total():.4f}s)"
+
+
+class BuildProfile():
+    '''
+    Collects the PageProfile of every generated page and prints the report at the end of the build
+    '''
+    def __init__(self):
+        self.pages = []
+
+    def add(self, page_profile):
+        self.pages.append(page_profile)
+
+    def stage_totals(self):
+        timings = dict.fromkeys(page_stages, 0.0)
+        allocations = dict.fromkeys(page_stages, 0)
+        for page in self.pages:
+            for name, seconds in page.timings.items():
+                timings[name] = timings.get(name, 0.0) + seconds
+            for name, blocks in page.allocations.items():
+                allocations[name] = allocations.get(name, 0) + blocks
+        return timings, allocations
+
+    def report(self, top=10, out=None):
+        '''
+        Docstring for report
+        Goal: print the stage breakdown and the slowest pages
+
+        :param top: number of slowest pages to print
+        :param out: file-like object, stdout if None
+        '''
+        if out is None:
+            out = sys.stdout
+        timings, allocations = self.stage_totals()
+        total = sum(timings.values())
+        print(f"Profile of {len(self.pages)} page(s), {total:.4f}s in generate_page", file=out)
+        print(f"  {'stage':<16} {'time (s)':>10} {'share':>7} {'alloc blocks':>14}", file=out)
+        for name in timings:
+            share = timings[name] / total * 100 if total > 0 else 0.0
+            print(f"  {name:<16} {timings[name]:>10.4f} {share:>6.1f}% {allocations[name]:>14}", file=out)
+
+        slowest = sorted(self.pages, key=lambda page: page.total(), reverse=True)[:top]
+        print(f"Slowest {len(slowest)} page(s):", file=out)
+        for page in slowest:
+            worst = max(page.timings, key=page.timings.get)
+            print(f"  {page.total():>10.4f}s  {page.path}  (mostly {worst})", file=out)
@@ -0,0 +1,226 @@
+import io
+import re
+
+from htmlnode import (escape_text, void_tags)
+
+# slots that can be filled in the template, e.g. {{ Title }}
+slot_pattern = re.compile(r"\{\{ (Title|Content) \}\}")
+
+
+# href="/..." and src="/..." in the template text
+template_url_pattern = re.compile(r'(href|src)="(/[^"]*)"')
+
+# minify_template: elements whose text is kept as it is
+template_raw_pattern = re.compile(r"<(pre|textarea|script|style)\b.*?</\1\s*>", re.DOTALL | re.IGNORECASE)
+# comments, but not conditional comments
+template_comment_pattern = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+# whitespace between two tags, group 2 and 4 are their names
+template_between_tags_pattern = re.compile(r"(<(/?[!A-Za-z][\w-]*)[^>]*>)\s+(?=<(/?)([!A-Za-z][\w-]*))")
+# whitespace next to these is never shown, it is only the indentation of the template
+template_block_tags = {"!doctype", "html", "head", "body", "title", "meta", "link", "base", "script", "style",
+                       "noscript", "template", "main", "article", "section", "header", "footer", "nav", "aside",
+                       "div", "p", "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "li", "dl", "dt", "dd", "pre",
+                       "blockquote", "figure", "figcaption", "hr", "table", "thead", "tbody", "tfoot", "tr", "td",
+                       "th", "form", "fieldset", "address", "details", "summary"}
+template_space_pattern = re.compile(r"\s+")
+# "/>" is dropped on void elements only - in svg and mathml it closes the element
+template_void_closing_pattern = re.compile(r"<(" + "|".join(sorted(void_tags)) + r")\b([^>]*?)\s*/>", re.IGNORECASE)
+# end tags html lets us leave out at the end of the page
+template_optional_tail_pattern = re.compile(r"(</body>)?(</html>)?$", re.IGNORECASE)
+
+
+class UrlRewriter():
+    '''
+    Turns site absolute urls ("/blog/tom") into urls under the basepath ("/static_site_gen/blog/tom")
+    Pass .rewrite as rewrite_url to HTMLNode.iter_html / to_html
+
+    :param asset_urls: optional dict site url -> fingerprinted site url (see fingerprint module),
+    applied before the basepath
+    '''
+    def __init__(self, basepath, asset_urls=None):
+        self.basepath = basepath
+        self.asset_urls = asset_urls
+
+    def rewrite(self, url):
+        if url.startswith("/"):
+            if self.asset_urls is not None:
+                url = self.asset_urls.get(url, url)
+            return self.basepath + url[1:]
+        return url
+
+    def rewrite_html(self, html):
+        #only for the template itself - it is plain text, not HTMLNodes
+        return template_url_pattern.sub(lambda match: f'{match.group(1)}="{self.rewrite(match.group(2))}"', html)
+
+
+class Template():
+    '''
+    A template split once at its slots
+    segments is a list of ("text", literal) and ("slot", slot name) tuples - rendering only
+    writes the literals and fills the slots, the template is never searched again
+    '''
+    def __init__(self, segments, rewriter, minify=False, images=None):
+        self.segments = segments
+        self.rewriter = rewriter
+        #the content is serialized minified too, see HTMLNode.iter_html
+        self.minify = minify
+        #site url -> ImageInfo (see images module), for the img tags of the content
+        self.images = images
+        #the page can only be streamed in parts around exactly one {{ Content }}
+        self.content_index = None
+        if segments.count(("slot", "Content")) == 1:
+            self.content_index = segments.index(("slot", "Content"))
+
+    def render(self, out, title, node):
+        '''
+        Docstring for render
+        Goal: write the page into out, the content node is streamed straight into it
+
+        :param out: file-like object opened for text
+        :param title: page title for {{ Title }}, plain text
+        :param node: HTMLNode for {{ Content }}
+        '''
+        for kind, value in self.segments:
+            if kind == "text":
+                out.write(value)
+            elif value == "Title":
+                out.write(escape_text(title))
+            else:
+                node.write_html(out, self.rewriter.rewrite, self.minify, self.image_props)
+
+    def image_props(self, src):
+        #props added to an img tag, see HTMLNode.iter_html
+        if self.images is None:
+            return None
+        info = self.images.get(src)
+        if info is None:
+            return None
+        return info.props(self.rewriter.rewrite)
+
+    def write_head(self, out, title):
+        #everything before {{ Content }}, see content_index
+        self.write_segments(out, self.segments[:self.content_index], title)
+
+    def write_tail(self, out, title):
+        #everything after {{ Content }}
+        self.write_segments(out, self.segments[self.content_index + 1:], title)
+
+    def write_segments(self, out, segments, title):
+        for kind, value in segments:
+            if kind == "text":
+                out.write(value)
+            else:
+                out.write(escape_text(title))
+
+    def extract_content(self, html, title):
+        '''
+        Docstring for extract_content
+        Goal: take the {{ Content }} html back out of a page rendered with this template, so it is not rendered again
+
+        :param html: the whole rendered page
+        :param title: the title the page was rendered with
+        :returns: the content html, None if the page does not match the template
+        '''
+        if self.content_index is None:
+            return None
+        head = io.StringIO()
+        self.write_head(head, title)
+        head = head.getvalue()
+        tail = io.StringIO()
+        self.write_tail(tail, title)
+        tail = tail.getvalue()
+        if len(html) < len(head) + len(tail) or not html.startswith(head) or not html.endswith(tail):
+            return None
+        return html[len(head):len(html) - len(tail)]
+
+    def render_html(self, out, title, html):
+        #same as render, but the content is already serialized
+        for kind, value in self.segments:
+            if kind == "text":
+                out.write(value)
+            elif value == "Title":
+                out.write(escape_text(title))
+            else:
+                out.write(html)
+
+
+def is_block_tag(name):
+    return name.lstrip("/").lower() in template_block_tags
+
+
+def collapse_between_tags(match):
+    #gone between two block tags, one space otherwise - between inline elements it shows
+    if is_block_tag(match.group(2)) and is_block_tag(match.group(4)):
+        return match.group(1)
+    return match.group(1) + " "
+
+
+def minify_template_text(text, before=None, after=None):
+    '''
+    Docstring for minify_template_text
+    Goal: minify the text between the raw elements of the template, see minify_template
+
+    :param before: name of the raw element right before the text (e.g. "pre"), None at the start
+    :param after: name of the raw element right after the text, None at the end
+    '''
+    #the neighbouring raw elements take part in the whitespace rules through stand-in tags
+    head = f"</{before}>" if before is not None else ""
+    tail = f"<{after}>" if after is not None else ""
+    text = template_comment_pattern.sub("", head + text + tail)
+    text = template_between_tags_pattern.sub(collapse_between_tags, text)
+    text = template_space_pattern.sub(" ", text)
+    text = template_void_closing_pattern.sub(r"<\1\2>", text)
+    return text[len(head):len(text) - len(tail)]
+
+
+def minify_template(template):
+    '''
+    Docstring for minify_template
+    Goal: collapse the whitespace of the template once, when it is compiled - not in every page
+    Whitespace between two block tags goes, other runs of whitespace become one space (between
+    inline elements it shows), comments and the "/>" of void elements go, and so do </body></html> at the end
+    pre, textarea, script and style elements are kept as they are
+    '''
+    parts = []
+    position = 0
+    before = None
+    for match in template_raw_pattern.finditer(template):
+        parts.append(minify_template_text(template[position:match.start()], before, match.group(1)))
+        parts.append(match.group(0))
+        position = match.end()
+        before = match.group(1)
+    parts.append(minify_template_text(template[position:], before))
+    return template_optional_tail_pattern.sub("", "".join(parts).strip(), count=1)
+
+
+def compile_template(template, basepath, asset_urls=None, minify=False, images=None):
+    '''
+    Docstring for compile_template
+    Goal: split the template at {{ Title }} / {{ Content }} and apply the basepath to it, once per build
+
+    :param template: template html as a string
+    :param basepath: prefix for the absolute href/src links
+    :param asset_urls: optional fingerprinted asset urls, see UrlRewriter
+    :param minify: minify the template (see minify_template) and the pages rendered with it
+    :param images: optional dict site url -> ImageInfo (see images module), adds the size and the
+    variants of the images to their img tags
+    :returns: Template
+    '''
+    if minify:
+        template = minify_template(template)
+    rewriter = UrlRewriter(basepath, asset_urls)
+    segments = []
+    position = 0
+    for match in slot_pattern.finditer(template):
+        if match.start() > position:
+            segments.append(("text", rewriter.rewrite_html(template[position:match.start()])))
+        segments.append(("slot", match.group(1)))
+        position = match.end()
+    if position < len(template):
+        segments.append(("text", rewriter.rewrite_html(template[position:])))
+    return Template(segments, rewriter, minify, images)
+
+
+def load_template(template_path, basepath, asset_urls=None, minify=False, images=None):
+    with open(template_path, "r") as template_file:
+        return compile_template(template_file.read(), basepath, asset_urls, minify, images)
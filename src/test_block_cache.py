@@ -0,0 +1,54 @@
+import os
+import tempfile
+import unittest
+
+from block_cache import (BlockCache)
+from block_markdown import (BlockType, markdown_to_html_node, set_block_cache)
+from htmlnode import (LeafNode)
+
+
+class TestBlockCache(unittest.TestCase):
+    def tearDown(self):
+        set_block_cache(None)
+
+    def test_lru_eviction(self):
+        cache = BlockCache(max_entries=2)
+        cache.put((BlockType.PARAGRAPH, "a"), LeafNode(None, "a"))
+        cache.put((BlockType.PARAGRAPH, "b"), LeafNode(None, "b"))
+        cache.get((BlockType.PARAGRAPH, "a"))
+        cache.put((BlockType.PARAGRAPH, "c"), LeafNode(None, "c"))
+        self.assertEqual(
+            list(cache.entries),
+            [(BlockType.PARAGRAPH, "a"), (BlockType.PARAGRAPH, "c")],
+        )
+
+    def test_long_blocks_not_cached(self):
+        cache = BlockCache(max_block_length=5)
+        cache.put((BlockType.PARAGRAPH, "too long"), LeafNode(None, "too long"))
+        self.assertEqual(len(cache.entries), 0)
+
+    def test_repeated_blocks_hit(self):
+        cache = BlockCache()
+        set_block_cache(cache)
+        md = "# title\n\nfooter with a [link](/)\n\n- shared item"
+        first = markdown_to_html_node(md).to_html()
+        second = markdown_to_html_node(md).to_html()
+        self.assertEqual(first, second)
+        self.assertEqual(cache.misses, 3)
+        self.assertEqual(cache.hits, 3)
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.pickle")
+            cache = BlockCache()
+            cache.put((BlockType.PARAGRAPH, "a"), LeafNode(None, "a"))
+            cache.save(path, "v1")
+
+            loaded = BlockCache().load(path, "v1")
+            self.assertEqual(loaded.get((BlockType.PARAGRAPH, "a")).to_html(), "a")
+            #saved by another version of the generator - ignored
+            self.assertEqual(len(BlockCache().load(path, "v2").entries), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
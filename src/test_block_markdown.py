@@ -1,6 +1,7 @@
+import io
 import unittest
 from block_markdown import (
-    markdown_to_blocks, block_to_block_type, BlockType, markdown_to_html_node
+    markdown_to_blocks, block_to_block_type, BlockType, markdown_to_html_node, iter_blocks
 )
 
 
@@ -49,6 +50,47 @@ This is the same paragraph on a new line
             ],
         )
 
+    def test_iter_blocks_code_with_blank_lines(self):
+        md = """
+Some paragraph
+
+```
+def main():
+
+    print("hi")
+
+
+```
+
+after the code
+"""
+        blocks = list(iter_blocks(io.StringIO(md)))
+        self.assertEqual(
+            blocks,
+            [
+                "Some paragraph",
+                '```\ndef main():\n\n    print("hi")\n\n\n```',
+                "after the code",
+            ],
+        )
+
+    def test_iter_blocks_whitespace_lines(self):
+        md = "first\r\n   \r\nsecond\r\nline\r\n"
+        self.assertEqual(list(iter_blocks(io.StringIO(md))), ["first", "second\nline"])
+
+    def test_iter_blocks_inline_fence(self):
+        md = "```one line```\n\nparagraph"
+        self.assertEqual(list(iter_blocks(md.split("\n"))), ["```one line```", "paragraph"])
+
+    def test_iter_blocks_inline_code_starting_a_line(self):
+        md = "# T\n\n```x``` is inline code here\n\nSecond paragraph\n\n## Heading"
+        self.assertEqual(
+            list(iter_blocks(md.split("\n"))),
+            ["# T", "```x``` is inline code here", "Second paragraph", "## Heading"],
+        )
+        md = "paragraph\n```not a fence\n\nnext"
+        self.assertEqual(list(iter_blocks(md.split("\n"))), ["paragraph\n```not a fence", "next"])
+
     def test_block_to_block_types(self):
         block = "# heading"
         self.assertEqual(block_to_block_type(block), BlockType.HEADING)
@@ -63,6 +105,29 @@ This is the same paragraph on a new line
         block = "paragraph"
         self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
 
+    def test_block_to_block_types_almost(self):
+        blocks = [
+            "####### seven",
+            "#no space",
+            "```\ncode",
+            "```one line```",
+            "> quote\nnot quote",
+            "- list\n-not list",
+            "- list\n* other list",
+            "1. one\n3. three",
+            "2. two\n3. three",
+            "1.no space",
+            "",
+        ]
+        for block in blocks:
+            self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH, block)
+
+    def test_block_to_block_type_long_olist(self):
+        block = "\n".join(f"{i}. item" for i in range(1, 1001))
+        self.assertEqual(block_to_block_type(block), BlockType.OLIST)
+        node = markdown_to_html_node(block)
+        self.assertEqual(len(node.children[0].children), 1000)
+
 
 
     def test_paragraph(self):
@@ -163,5 +228,19 @@ the **same** even with inline stuff
             "<div><pre><code>This is text that _should_ remain\nthe **same** even with inline stuff\n</code></pre></div>",
         )
 
+    def test_code_with_blank_line_from_file(self):
+        md = """
+```
+first
+
+second
+```
+"""
+        node = markdown_to_html_node(io.StringIO(md))
+        self.assertEqual(
+            node.to_html(),
+            "<div><pre><code>first\n\nsecond\n</code></pre></div>",
+        )
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,83 @@
+import gzip
+import os
+import tempfile
+import unittest
+from unittest.mock import (patch)
+
+from compress import (compress_file, compress_tree, remove_siblings)
+from manifest import (BuildManifest)
+
+
+class TestCompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = self.tmp.name
+        os.makedirs(os.path.join(self.public, "images"))
+        self.html = self.write("index.html", "<p>hello</p>" * 100)
+        self.write("images/tom.png", "png" * 100)
+        self.write("tiny.css", "a{}")
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.public, name)
+        with open(path, "w") as file:
+            file.write(text)
+        return path
+
+    def test_compress_tree(self):
+        stats = compress_tree(self.public, self.manifest)
+        self.assertEqual(stats.written_files, 1)
+        with gzip.open(self.html + ".gz", "rt") as file:
+            self.assertEqual(file.read(), "<p>hello</p>" * 100)
+        #images are compressed already, tiny files do not get smaller
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images", "tom.png.gz")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "tiny.css.gz")))
+
+    def test_up_to_date_siblings_are_skipped(self):
+        compress_tree(self.public, self.manifest)
+        with patch("compress.gzip_bytes") as gzip_bytes:
+            stats = compress_tree(self.public, self.manifest)
+        gzip_bytes.assert_not_called()
+        self.assertEqual(stats.skipped_files, 1)
+
+        self.write("index.html", "<p>changed</p>" * 100)
+        os.utime(self.html, ns=(10 ** 18, 10 ** 18))
+        self.assertEqual(compress_file(self.html).written_files, 1)
+        with gzip.open(self.html + ".gz", "rt") as file:
+            self.assertEqual(file.read(), "<p>changed</p>" * 100)
+
+    def test_stale_siblings_are_removed(self):
+        compress_tree(self.public, self.manifest)
+        os.remove(self.html)
+        self.assertEqual(compress_tree(self.public, self.manifest).removed_files, 1)
+        self.assertFalse(os.path.exists(self.html + ".gz"))
+
+    def test_siblings_of_a_missing_encoder_are_removed(self):
+        #left from a build that had brotli installed
+        self.manifest.compressed[self.write("index.html.br", "old brotli")] = self.html
+        with patch("compress.brotli", None):
+            stats = compress_tree(self.public, self.manifest)
+        self.assertEqual((stats.written_files, stats.removed_files), (1, 1))
+        self.assertFalse(os.path.exists(self.html + ".br"))
+        self.assertTrue(os.path.exists(self.html + ".gz"))
+
+    def test_shipped_compressed_files_are_kept(self):
+        #a static file, not a sibling written by compress_tree
+        shipped = self.write("data.json.gz", "gzip data")
+        compress_tree(self.public, self.manifest)
+        self.assertEqual(compress_tree(self.public, self.manifest).removed_files, 0)
+        self.assertTrue(os.path.exists(shipped))
+        self.assertEqual(self.manifest.compressed, {self.html + ".gz": self.html})
+
+    def test_build_without_precompress_removes_siblings(self):
+        compress_tree(self.public, self.manifest)
+        self.assertEqual(remove_siblings(self.manifest), 1)
+        self.assertFalse(os.path.exists(self.html + ".gz"))
+        self.assertEqual(self.manifest.compressed, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+
+from content_index import (ContentIndex, page_filename)
+
+
+class TestContentIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.public = os.path.join(self.tmp.name, "public")
+        os.makedirs(os.path.join(self.content, "blog", "post"))
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\ntext")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as file:
+            file.write(text)
+
+    def test_entries(self):
+        index = ContentIndex(self.content, self.public)
+        entries = sorted(index)
+        self.assertEqual(
+            [(entry.source, entry.dest, entry.stat.st_size) for entry in entries],
+            [
+                (os.path.join(self.content, "blog", "post", "index.md"),
+                 os.path.join(self.public, "blog", "post", "index.md"), 12),
+                (os.path.join(self.content, "index.md"), os.path.join(self.public, "index.md"), 6),
+            ],
+        )
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.total_size(), 18)
+
+    def test_rename(self):
+        index = ContentIndex(self.content, self.public, page_filename)
+        self.assertEqual(
+            sorted(entry.dest for entry in index),
+            [os.path.join(self.public, "blog", "post", "index.html"), os.path.join(self.public, "index.html")],
+        )
+
+    def test_dirs_parents_first(self):
+        index = ContentIndex(self.content, self.public)
+        self.assertEqual(
+            index.dirs,
+            [self.public, os.path.join(self.public, "blog"), os.path.join(self.public, "blog", "post")],
+        )
+
+    def test_page_filename(self):
+        self.assertEqual(page_filename("index.md"), "index.html")
+        self.assertEqual(page_filename("notes.draft.md"), "notes.html")
+
+
+if __name__ == "__main__":
+    unittest.main()
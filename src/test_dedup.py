@@ -0,0 +1,86 @@
+import os
+import tempfile
+import unittest
+
+from dedup import (OutputDedup)
+from handle_files import (collect_pages, generate_pages, sync_files_recursive)
+from manifest import (BuildManifest, hash_file)
+
+
+class TestOutputDedup(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        self.write(self.template, "<title>{{ Title }}</title><article>{{ Content }}</article>")
+        for name in ["en", "de", "fr"]:
+            self.write(os.path.join(self.content, name, "index.md"), "# Stub\n\nComing soon")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nWelcome")
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        self.manifest.set_environment({"template": "a"})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(text)
+
+    def page(self, name):
+        return os.path.join(self.public, name, "index.html")
+
+    def test_identical_pages_are_linked(self):
+        dedup = OutputDedup()
+        generate_pages(collect_pages(self.content, self.public), self.template, "/", self.manifest, dedup=dedup)
+        self.assertTrue(os.path.samefile(self.page("en"), self.page("de")))
+        self.assertTrue(os.path.samefile(self.page("en"), self.page("fr")))
+        self.assertFalse(os.path.samefile(self.page("en"), os.path.join(self.public, "index.html")))
+        self.assertEqual((dedup.linked_files, dedup.saved_bytes), (2, 2 * os.path.getsize(self.page("en"))))
+
+        #a rewritten page gets a file of its own, the other links keep their content
+        self.write(os.path.join(self.content, "de", "index.md"), "# Stub\n\nBald")
+        generate_pages(collect_pages(self.content, self.public), self.template, "/", self.manifest, dedup=OutputDedup())
+        self.assertFalse(os.path.samefile(self.page("en"), self.page("de")))
+        with open(self.page("en")) as file:
+            self.assertIn("Coming soon", file.read())
+
+    def test_new_page_links_to_unchanged_page(self):
+        generate_pages(collect_pages(self.content, self.public), self.template, "/", self.manifest, dedup=OutputDedup())
+        self.manifest.set_environment({"template": "a"})
+        self.write(os.path.join(self.content, "es", "index.md"), "# Stub\n\nComing soon")
+        dedup = OutputDedup()
+        self.assertEqual(generate_pages(collect_pages(self.content, self.public), self.template, "/", self.manifest,
+                                        dedup=dedup), 1)
+        self.assertTrue(os.path.samefile(self.page("en"), self.page("es")))
+
+    def test_stale_seed_is_not_linked(self):
+        path = os.path.join(self.tmp.name, "old.html")
+        self.write(path, "changed since the last build")
+        new_path = os.path.join(self.tmp.name, "new.html")
+        self.write(new_path, "old content")
+        dedup = OutputDedup()
+        dedup.seed(hash_file(new_path), path)
+        dedup.add_output(new_path)
+        self.assertFalse(os.path.samefile(path, new_path))
+        self.assertEqual(dedup.linked_files, 0)
+
+    def test_identical_static_files_are_linked(self):
+        for name in ["a.png", "b.png"]:
+            self.write(os.path.join(self.static, name), "same image")
+        self.write(os.path.join(self.static, "c.png"), "other image")
+        dedup = OutputDedup()
+        sync_files_recursive(self.static, self.public, self.manifest, use_links=False, dedup=dedup)
+        self.assertTrue(os.path.samefile(os.path.join(self.public, "a.png"), os.path.join(self.public, "b.png")))
+        self.assertEqual(dedup.duplicate_files, 1)
+
+        #the next build finds the link in place
+        dedup = OutputDedup()
+        stats = sync_files_recursive(self.static, self.public, self.manifest, use_links=False, dedup=dedup)
+        self.assertEqual((stats.skipped_files, dedup.linked_files, dedup.duplicate_files), (3, 0, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
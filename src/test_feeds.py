@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+
+from feeds import (iter_sitemap_urls, write_sitemap, write_atom_feed)
+from manifest import (BuildManifest)
+from template import (compile_template)
+
+
+class TestFeeds(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, "public")
+        os.makedirs(self.public)
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        self.template = compile_template("<title>{{ Title }}</title><main>{{ Content }}</main>", "/base/")
+        self.add_page("index.md", "index.html", "Home")
+        self.add_page("blog/old/index.md", os.path.join("blog", "old", "index.html"), "Old & busted", "2024-05-01")
+        self.add_page("blog/new/index.md", os.path.join("blog", "new", "index.html"), "New", "2025-01-31")
+        self.manifest.record_listing(os.path.join(self.public, "blog", "index.html"), "signature")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def add_page(self, source, dest, title, date=None):
+        dest = os.path.join(self.public, dest)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        with open(dest, "w") as file:
+            file.write(f'<title>{title}</title><main><div><a href="/base/">{title}</a></div></main>')
+        metadata = {"date": date} if date is not None else {}
+        self.manifest.record_page(source, dest, "hash", meta={"title": title, "metadata": metadata})
+        self.manifest.pages[source]["mtime_ns"] = 1738368000 * 10 ** 9
+
+    def read(self, filename):
+        with open(os.path.join(self.public, filename)) as file:
+            return file.read()
+
+    def sitemap_urls(self):
+        return iter_sitemap_urls(self.manifest, self.public, "https://example.com/", "/base/")
+
+    def test_sitemap_urls(self):
+        self.assertEqual(
+            list(self.sitemap_urls()),
+            [
+                ("https://example.com/base/", "2025-02-01"),
+                ("https://example.com/base/blog/", None),
+                ("https://example.com/base/blog/new/", "2025-02-01"),
+                ("https://example.com/base/blog/old/", "2025-02-01"),
+            ],
+        )
+
+    def test_sitemap(self):
+        written = write_sitemap(self.sitemap_urls(), self.public, "https://example.com", "/base/")
+        self.assertEqual(written, [os.path.join(self.public, "sitemap.xml")])
+        sitemap = self.read("sitemap.xml")
+        self.assertTrue(sitemap.startswith('<?xml version="1.0" encoding="UTF-8"?>\n<urlset '))
+        self.assertIn("<url><loc>https://example.com/base/blog/</loc></url>", sitemap)
+        self.assertEqual(sitemap.count("<url>"), 4)
+
+    def test_sitemap_index(self):
+        write_sitemap(self.sitemap_urls(), self.public, "https://example.com", "/base/", max_urls=3)
+        sitemap = self.read("sitemap.xml")
+        self.assertIn("<sitemapindex ", sitemap)
+        self.assertIn("<sitemap><loc>https://example.com/base/sitemap-2.xml</loc></sitemap>", sitemap)
+        self.assertEqual(self.read("sitemap-1.xml").count("<url>"), 3)
+        self.assertEqual(self.read("sitemap-2.xml").count("<url>"), 1)
+
+        #a smaller site later removes the parts
+        write_sitemap(self.sitemap_urls(), self.public, "https://example.com", "/base/")
+        self.assertFalse(os.path.exists(os.path.join(self.public, "sitemap-1.xml")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "sitemap-2.xml")))
+
+    def test_atom_feed(self):
+        write_atom_feed(self.manifest, self.template, self.public, "https://example.com", "/base/", "Home")
+        feed = self.read("feed.xml")
+        self.assertIn('xml:base="https://example.com/base/"', feed)
+        self.assertIn("<updated>2025-01-31T00:00:00Z</updated>\n<entry><title>New</title>", feed)
+        self.assertIn("<title>Old &amp; busted</title>", feed)
+        self.assertIn(
+            '<content type="html">&lt;div&gt;&lt;a href="/base/"&gt;New&lt;/a&gt;&lt;/div&gt;</content>',
+            feed,
+        )
+        self.assertEqual(feed.count("<entry>"), 2)
+
+    def test_atom_feed_max_entries(self):
+        write_atom_feed(self.manifest, self.template, self.public, "https://example.com", "/base/", "Home", 1)
+        self.assertEqual(self.read("feed.xml").count("<entry>"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from dedup import (OutputDedup)
+from file_io import (DirectIO, BackgroundIO)
+from manifest import (hash_file)
+
+
+class TestFileIO(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.sources = []
+        for i in range(5):
+            path = os.path.join(self.dir, f"page{i}.md")
+            with open(path, "w") as file:
+                file.write(f"# page {i}\n\nbody {i}\n")
+            self.sources.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def read(self, path):
+        with open(path, "r") as file:
+            return file.read()
+
+    def test_direct_io(self):
+        page_io = DirectIO()
+        with page_io.read_lines(self.sources[0]) as lines:
+            self.assertEqual(list(lines), ["# page 0\n", "\n", "body 0\n"])
+        dest_path = os.path.join(self.dir, "out", "a", "index.html")
+        out = page_io.open_output(dest_path)
+        out.write("<p>")
+        out.write("</p>")
+        self.assertFalse(os.path.exists(dest_path))
+        out.commit()
+        self.assertEqual(self.read(dest_path), "<p></p>")
+        self.assertEqual(page_io.created_dirs, {os.path.join(self.dir, "out", "a")})
+
+    def test_direct_io_abort(self):
+        dest_path = os.path.join(self.dir, "out", "index.html")
+        out = DirectIO().open_output(dest_path)
+        out.write("half a page")
+        out.abort()
+        self.assertEqual(os.listdir(os.path.join(self.dir, "out")), [])
+
+    def test_background_io_prefetch(self):
+        page_io = BackgroundIO(read_ahead=2)
+        page_io.schedule(self.sources)
+        self.assertEqual(len(page_io.prefetched), 2)
+        for i, path in enumerate(self.sources):
+            with page_io.read_lines(path) as lines:
+                self.assertEqual(list(lines), [f"# page {i}\n", "\n", f"body {i}\n"])
+        self.assertEqual(page_io.close(), {})
+
+    def test_background_io_streams_big_sources(self):
+        page_io = BackgroundIO(max_prefetch_size=0)
+        page_io.schedule(self.sources[:1])
+        with page_io.read_lines(self.sources[0]) as lines:
+            self.assertEqual(list(lines), ["# page 0\n", "\n", "body 0\n"])
+        page_io.close()
+
+    def test_background_io_writes(self):
+        page_io = BackgroundIO(chunk_size=4)
+        dest_paths = [os.path.join(self.dir, "out", f"{i}", "index.html") for i in range(3)]
+        for i, dest_path in enumerate(dest_paths):
+            out = page_io.open_output(dest_path)
+            for part in ["<p>", f"page {i}", "</p>"]:
+                out.write(part)
+            out.commit()
+        empty = page_io.open_output(os.path.join(self.dir, "out", "empty.html"))
+        empty.commit()
+        aborted = page_io.open_output(os.path.join(self.dir, "out", "aborted.html"))
+        aborted.write("half a page")
+        aborted.abort()
+        self.assertEqual(page_io.close(), {})
+        for i, dest_path in enumerate(dest_paths):
+            self.assertEqual(self.read(dest_path), f"<p>page {i}</p>")
+        self.assertEqual(self.read(os.path.join(self.dir, "out", "empty.html")), "")
+        self.assertEqual(sorted(os.listdir(os.path.join(self.dir, "out"))), ["0", "1", "2", "empty.html"])
+
+    def test_background_io_write_errors(self):
+        page_io = BackgroundIO()
+        dest_path = os.path.join(self.dir, "out", "index.html")
+        out = page_io.open_output(dest_path)
+        #a directory where the temporary file should go
+        os.makedirs(dest_path + ".tmp")
+        out.write("page")
+        out.commit()
+        errors = page_io.close()
+        self.assertEqual(list(errors), [dest_path])
+
+    def test_writers_hash_and_link_duplicates(self):
+        for page_io in [DirectIO(dedup=OutputDedup()), BackgroundIO(chunk_size=4, dedup=OutputDedup())]:
+            dest_paths = [os.path.join(self.dir, type(page_io).__name__, f"{i}.html") for i in range(3)]
+            digests = []
+            #the outputs are never read back for their hash
+            with mock.patch("dedup.hash_file") as read_back:
+                for i, dest_path in enumerate(dest_paths):
+                    out = page_io.open_output(dest_path)
+                    out.write("<p>same</p>" if i < 2 else "<p>other</p>")
+                    digests.append(out.commit())
+                self.assertEqual(page_io.close(), {})
+                read_back.assert_not_called()
+            self.assertEqual(digests, [hash_file(dest_path) for dest_path in dest_paths])
+            self.assertTrue(os.path.samefile(dest_paths[0], dest_paths[1]))
+            self.assertFalse(os.path.samefile(dest_paths[0], dest_paths[2]))
+            self.assertEqual(page_io.dedup.linked_files, 1)
+            self.assertEqual(sorted(os.listdir(os.path.dirname(dest_paths[0]))), ["0.html", "1.html", "2.html"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import (patch)
+
+from content_index import (ContentIndex)
+from fingerprint import (fingerprint_index, fingerprint_path, write_headers, remove_headers)
+from handle_files import (sync_index)
+from manifest import (BuildManifest, hash_file)
+from template import (UrlRewriter, compile_template)
+
+
+class TestFingerprint(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.css = os.path.join(self.static, "index.css")
+        self.write(self.css, "body {}")
+        self.write(os.path.join(self.static, "images", "tom.png"), "png")
+        self.write(os.path.join(self.static, "robots.txt"), "User-agent: *")
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as file:
+            file.write(text)
+        #old enough for the hash to be cached
+        os.utime(path, ns=(10 ** 18, 10 ** 18))
+
+    def test_fingerprint_path(self):
+        self.assertEqual(fingerprint_path("images/tom.png", "0123456789abcdef"), "images/tom.0123456789ab.png")
+
+    def test_fingerprint_index(self):
+        index = ContentIndex(self.static, self.public)
+        asset_urls = fingerprint_index(index, self.manifest)
+        css_url = "/" + os.path.basename(fingerprint_path("index.css", hash_file(self.css)))
+        self.assertEqual(asset_urls["/index.css"], css_url)
+        self.assertEqual(sorted(asset_urls), ["/images/tom.png", "/index.css"])
+
+        sync_index(index, self.manifest)
+        self.assertTrue(os.path.exists(os.path.join(self.public, css_url[1:])))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "robots.txt")))
+        #url(images/tom.png) in the stylesheet still finds the image
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.css")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "images", "tom.png")))
+
+        #next build: an older hashed output is stale, the un-hashed one is not
+        self.manifest.save()
+        manifest = BuildManifest(self.manifest.path).load()
+        self.write(self.css, "body { color: red }")
+        index = ContentIndex(self.static, self.public)
+        fingerprint_index(index, manifest)
+        sync_index(index, manifest)
+        self.assertEqual(manifest.prune_assets(), [os.path.join(self.public, css_url[1:])])
+        with open(os.path.join(self.public, "index.css")) as file:
+            self.assertEqual(file.read(), "body { color: red }")
+
+    def test_hashes_are_cached(self):
+        fingerprint_index(ContentIndex(self.static, self.public), self.manifest)
+        with patch("manifest.hash_file") as mock_hash:
+            fingerprint_index(ContentIndex(self.static, self.public), self.manifest)
+        mock_hash.assert_not_called()
+
+        self.write(self.css, "body { color: red }")
+        asset_urls = fingerprint_index(ContentIndex(self.static, self.public), self.manifest)
+        self.assertEqual(asset_urls["/index.css"], "/" + fingerprint_path("index.css", hash_file(self.css)))
+
+    def test_rewrite(self):
+        asset_urls = {"/index.css": "/index.0123.css"}
+        rewriter = UrlRewriter("/base/", asset_urls)
+        self.assertEqual(rewriter.rewrite("/index.css"), "/base/index.0123.css")
+        self.assertEqual(rewriter.rewrite("/blog/"), "/base/blog/")
+        template = compile_template('<link href="/index.css" />{{ Content }}', "/base/", asset_urls)
+        self.assertEqual(template.segments[0], ("text", '<link href="/base/index.0123.css" />'))
+
+    def test_write_headers(self):
+        os.makedirs(self.public)
+        path = write_headers({"/index.css": "/index.0123.css"}, self.public, "/base/")
+        with open(path) as file:
+            self.assertEqual(file.read(), "/base/index.0123.css\n  Cache-Control: public, max-age=31536000, immutable\n")
+
+    def test_remove_headers(self):
+        os.makedirs(self.public)
+        path = write_headers({"/index.css": "/index.0123.css"}, self.public, "/base/")
+        self.assertEqual(remove_headers(self.public, self.manifest), path)
+        self.assertFalse(os.path.exists(path))
+        self.assertIsNone(remove_headers(self.public, self.manifest))
+
+        #a _headers file of the static directory is an asset, not ours to delete
+        self.write(os.path.join(self.static, "_headers"), "/*\n  X-Frame-Options: DENY\n")
+        sync_index(ContentIndex(self.static, self.public), self.manifest)
+        self.assertIsNone(remove_headers(self.public, self.manifest))
+        self.assertTrue(os.path.exists(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,11 @@
+import os
+import tempfile
 import unittest
+from unittest.mock import (patch)
 
-from handle_files import (extract_title)
+from handle_files import (extract_title, collect_pages, generate_pages, sync_files_recursive, PageErrors)
+from manifest import (BuildManifest, hash_file)
+from profiler import (BuildProfile, page_stages)
 
 
 class TestExtractTitle(unittest.TestCase):
@@ -45,5 +50,236 @@ no title
         except Exception as e:
             pass
 
+
+class TestGeneratePages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(os.path.join(self.content, "blog", "post"))
+        self.write(self.template, "<title>{{ Title }}</title><article>{{ Content }}</article>")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nHello")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "# Post\n\n**bold**")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as file:
+            file.write(text)
+
+    def test_collect_pages(self):
+        pages = sorted(collect_pages(self.content, self.public))
+        self.assertEqual(
+            pages,
+            [
+                (os.path.join(self.content, "blog", "post", "index.md"),
+                 os.path.join(self.public, "blog", "post", "index.html")),
+                (os.path.join(self.content, "index.md"), os.path.join(self.public, "index.html")),
+            ],
+        )
+
+    def test_generate_pages_parallel(self):
+        pages = collect_pages(self.content, self.public)
+        generated = generate_pages(pages, self.template, "/", jobs=2)
+        self.assertEqual(generated, 2)
+        with open(os.path.join(self.public, "blog", "post", "index.html")) as file:
+            self.assertEqual(
+                file.read(),
+                "<title>Post</title><article><div><h1>Post</h1><p><b>bold</b></p></div></article>",
+            )
+
+    def test_generate_pages_profile(self):
+        pages = collect_pages(self.content, self.public)
+        profile = BuildProfile()
+        generate_pages(pages, self.template, "/", jobs=2, profile=profile)
+        self.assertEqual(sorted(page.path for page in profile.pages), sorted(page[0] for page in pages))
+        for page in profile.pages:
+            self.assertEqual(list(page.timings), page_stages)
+        with open(os.path.join(self.public, "index.html")) as file:
+            self.assertEqual(file.read(), "<title>Home</title><article><div><h1>Home</h1><p>Hello</p></div></article>")
+
+    def test_generate_pages_title_from_first_h1_block(self):
+        self.write(os.path.join(self.content, "index.md"), "```\n# not a title\n```\n\n# Home **page**\n\n# Second")
+        generate_pages([(os.path.join(self.content, "index.md"), os.path.join(self.public, "index.html"))],
+                       self.template, "/")
+        with open(os.path.join(self.public, "index.html")) as file:
+            self.assertTrue(file.read().startswith("<title>Home **page**</title>"))
+
+    def test_generate_pages_front_matter(self):
+        self.write(os.path.join(self.content, "index.md"), "---\ntitle: Front\ntags: a, b\n---\n# Home\n\nHello")
+        self.write(os.path.join(self.content, "blog", "post", "index.md"), "---\ntitle: Only front matter\n---\n")
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        generate_pages(collect_pages(self.content, self.public), self.template, "/", manifest)
+        with open(os.path.join(self.public, "index.html")) as file:
+            self.assertEqual(
+                file.read(),
+                "<title>Front</title><article><div><h1>Home</h1><p>Hello</p></div></article>",
+            )
+        with open(os.path.join(self.public, "blog", "post", "index.html")) as file:
+            self.assertEqual(file.read(), "<title>Only front matter</title><article><div></div></article>")
+        self.assertEqual(
+            manifest.page_meta(os.path.join(self.content, "index.md")),
+            {"title": "Front", "metadata": {"title": "Front", "tags": "a, b"}},
+        )
+
+    def test_generate_pages_records_title(self):
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        generate_pages(collect_pages(self.content, self.public), self.template, "/", manifest, jobs=2)
+        self.assertEqual(
+            manifest.page_meta(os.path.join(self.content, "blog", "post", "index.md")),
+            {"title": "Post", "metadata": {}},
+        )
+
+    def test_generate_pages_no_title(self):
+        self.write(os.path.join(self.content, "index.md"), "no title\n\n## not h1")
+        with self.assertRaises(Exception) as context:
+            generate_pages([(os.path.join(self.content, "index.md"), os.path.join(self.public, "index.html"))],
+                           self.template, "/")
+        self.assertIn("There is no H1 header", str(context.exception))
+
+    def test_generate_page_title_after_blocks(self):
+        self.write(os.path.join(self.content, "index.md"), "intro\n\n# Home\n\nbody")
+        generate_pages([(os.path.join(self.content, "index.md"), os.path.join(self.public, "index.html"))],
+                       self.template, "/")
+        with open(os.path.join(self.public, "index.html")) as file:
+            self.assertEqual(
+                file.read(),
+                "<title>Home</title><article><div><p>intro</p><h1>Home</h1><p>body</p></div></article>",
+            )
+
+    def test_generate_page_two_content_slots(self):
+        self.write(self.template, "{{ Content }}<title>{{ Title }}</title>{{ Content }}")
+        generate_pages([(os.path.join(self.content, "index.md"), os.path.join(self.public, "index.html"))],
+                       self.template, "/")
+        with open(os.path.join(self.public, "index.html")) as file:
+            self.assertEqual(
+                file.read(),
+                "<div><h1>Home</h1><p>Hello</p></div><title>Home</title><div><h1>Home</h1><p>Hello</p></div>",
+            )
+
+    def test_generate_page_failure_leaves_no_output(self):
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nfine\n\n**broken")
+        with self.assertRaises(Exception):
+            generate_pages([(os.path.join(self.content, "index.md"), os.path.join(self.public, "index.html"))],
+                           self.template, "/")
+        self.assertEqual(os.listdir(self.public), [])
+
+    def test_generate_pages_reports_errors_with_source(self):
+        broken = os.path.join(self.content, "blog", "post", "index.md")
+        self.write(broken, "# Post\n\n**not closed")
+        pages = collect_pages(self.content, self.public)
+        with self.assertRaises(Exception) as context:
+            generate_pages(pages, self.template, "/", jobs=2)
+        self.assertIn(broken, str(context.exception))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_generate_pages_reports_write_errors(self):
+        pages = collect_pages(self.content, self.public)
+        #a directory where the temporary output file should go
+        os.makedirs(os.path.join(self.public, "index.html.tmp"))
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        with self.assertRaises(Exception) as context:
+            generate_pages(pages, self.template, "/", manifest)
+        self.assertIn(os.path.join(self.content, "index.md"), str(context.exception))
+        self.assertEqual(list(manifest.pages), [os.path.join(self.content, "blog", "post", "index.md")])
+
+    def test_failed_page_is_generated_again(self):
+        pages = collect_pages(self.content, self.public)
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        manifest.set_environment({"template": "a"})
+        generate_pages(pages, self.template, "/", manifest)
+        #a new template, and the home page fails to write this time
+        manifest.set_environment({"template": "b"})
+        os.makedirs(os.path.join(self.public, "index.html.tmp"))
+        with self.assertRaises(Exception):
+            generate_pages(pages, self.template, "/", manifest)
+        manifest.save()
+
+        os.rmdir(os.path.join(self.public, "index.html.tmp"))
+        manifest = BuildManifest(manifest.path).load()
+        manifest.set_environment({"template": "b"})
+        self.assertEqual(generate_pages(pages, self.template, "/", manifest), 1)
+
+    def test_unreadable_source_keeps_the_other_pages(self):
+        pages = collect_pages(self.content, self.public)
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        manifest.set_environment({"template": "a"})
+        generate_pages(pages, self.template, "/", manifest)
+        home = os.path.join(self.content, "index.md")
+        post = os.path.join(self.content, "blog", "post", "index.md")
+
+        def unreadable_home(path):
+            if path == home:
+                raise PermissionError(f"Permission denied: {path}")
+            return hash_file(path)
+
+        manifest.set_environment({"template": "b"})
+        with patch("manifest.hash_file", unreadable_home):
+            with self.assertRaises(PageErrors) as context:
+                generate_pages(pages, self.template, "/", manifest)
+        self.assertEqual([from_path for from_path, error in context.exception.errors], [home])
+        #the pages after it are still generated, and nothing is pruned
+        self.assertEqual(list(manifest.pages), [post])
+        self.assertEqual(manifest.prune(), [])
+        self.assertTrue(os.path.exists(os.path.join(self.public, "index.html")))
+
+
+class TestSyncFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write(os.path.join(self.static, "index.css"), "body {}")
+        self.write(os.path.join(self.static, "images", "tom.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as file:
+            file.write(text)
+
+    def sync(self, use_links=True):
+        manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json")).load()
+        stats = sync_files_recursive(self.static, self.public, manifest, use_links=use_links)
+        removed = manifest.prune_assets()
+        manifest.save()
+        return stats, removed
+
+    def test_sync_skips_unchanged(self):
+        stats, removed = self.sync(use_links=False)
+        self.assertEqual(stats.copied_files, 2)
+        self.assertEqual(stats.copied_bytes, 10)
+        stats, removed = self.sync(use_links=False)
+        self.assertEqual(stats.copied_files, 0)
+        self.assertEqual(stats.skipped_files, 2)
+        self.assertEqual(stats.skipped_bytes, 10)
+
+    def test_sync_copies_changed(self):
+        self.sync(use_links=False)
+        self.write(os.path.join(self.static, "index.css"), "body { color: red; }")
+        stats, removed = self.sync(use_links=False)
+        self.assertEqual(stats.copied_files, 1)
+        with open(os.path.join(self.public, "index.css")) as file:
+            self.assertEqual(file.read(), "body { color: red; }")
+
+    def test_sync_hardlinks(self):
+        stats, removed = self.sync()
+        self.assertEqual(stats.linked_files, 2)
+        self.assertTrue(os.path.samefile(
+            os.path.join(self.static, "index.css"), os.path.join(self.public, "index.css")
+        ))
+
+    def test_sync_removes_stale(self):
+        self.sync()
+        os.remove(os.path.join(self.static, "images", "tom.png"))
+        stats, removed = self.sync()
+        self.assertEqual(removed, [os.path.join(self.public, "images", "tom.png")])
+        self.assertFalse(os.path.exists(os.path.join(self.public, "images")))
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -1,6 +1,8 @@
+import html
+import io
 import unittest
 
-from htmlnode import HTMLNode, LeafNode, ParentNode
+from htmlnode import HTMLNode, LeafNode, ParentNode, escape_text, escape_attribute
 
 class TestHTMLNode(unittest.TestCase):
     def test_eq_props_populated(self):
@@ -54,6 +56,10 @@ class TestHTMLNode(unittest.TestCase):
             "HTMLNode(p, What a strange world, children: None, {'class': 'primary'})",
         )
 
+    def test_no_instance_dict(self):
+        for node in [HTMLNode("p"), LeafNode("b", "bold"), ParentNode("div", [])]:
+            self.assertFalse(hasattr(node, "__dict__"))
+
 class TestLeafNode(unittest.TestCase):
     def test_leaf_to_html_p(self):
         node = LeafNode("p", "Hello, world!")
@@ -115,5 +121,70 @@ class TestParentNode(unittest.TestCase):
             "<h2><b>Bold text</b>Normal text<i>italic text</i>Normal text</h2>",
         )
 
+    def test_iter_html_matches_to_html(self):
+        node = ParentNode(
+            "ul",
+            [
+                ParentNode("li", [LeafNode("b", "Bold text"), LeafNode(None, " item")]),
+                ParentNode("li", [LeafNode("a", "link", {"href": "/blog"})]),
+            ],
+        )
+        self.assertEqual(
+            "".join(node.iter_html()),
+            '<ul><li><b>Bold text</b> item</li><li><a href="/blog">link</a></li></ul>',
+        )
+
+    def test_write_html(self):
+        node = ParentNode("div", [ParentNode("p", [LeafNode(None, "text")])])
+        out = io.StringIO()
+        node.write_html(out)
+        self.assertEqual(out.getvalue(), "<div><p>text</p></div>")
+
+    def test_to_html_deep_tree(self):
+        node = LeafNode(None, "deep")
+        for i in range(5000):
+            node = ParentNode("blockquote", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<blockquote><blockquote>"))
+        self.assertEqual(len(html), 5000 * len("<blockquote></blockquote>") + len("deep"))
+
+    def test_to_html_no_children(self):
+        node = ParentNode("div", [ParentNode("p", None)])
+        with self.assertRaises(ValueError):
+            node.to_html()
+
+    def test_to_html_minify(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode(None, "one "), LeafNode("img", "", {"src": "/tom.png"})]),
+            ParentNode("ul", [ParentNode("li", [LeafNode(None, "a")]), LeafNode("li", "b")]),
+            ParentNode("p", [LeafNode(None, "two")]),
+            LeafNode(None, "text"),
+            ParentNode("a", [ParentNode("p", [LeafNode(None, "in a link")])]),
+        ])
+        self.assertEqual(
+            node.to_html(minify=True),
+            '<div><p>one <img src="/tom.png"><ul><li>a<li>b</ul><p>two</p>text<a><p>in a link</p></a></div>',
+        )
+
+    def test_to_html_minify_keeps_code(self):
+        code = "def main():\n\n    print('<p>')  \n"
+        node = ParentNode("pre", [LeafNode("code", code)])
+        self.assertEqual(node.to_html(minify=True), f"<pre><code>{html.escape(code, False)}</code></pre>")
+
+    def test_to_html_escapes(self):
+        node = ParentNode("p", [
+            LeafNode(None, "a < b && c > d"),
+            LeafNode("a", 'say "hi"', {"href": '/search?q="tom"&page=2'}),
+        ])
+        self.assertEqual(
+            node.to_html(),
+            '<p>a &lt; b &amp;&amp; c &gt; d<a href="/search?q=&quot;tom&quot;&amp;page=2">say "hi"</a></p>',
+        )
+
+    def test_escape_fast_path(self):
+        text = "nothing to escape"
+        self.assertIs(escape_text(text), text)
+        self.assertIs(escape_attribute(text), text)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
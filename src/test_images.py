@@ -0,0 +1,112 @@
+import os
+import struct
+import tempfile
+import unittest
+from unittest.mock import (patch)
+
+import images
+from content_index import (ContentIndex)
+from htmlnode import (LeafNode, ParentNode)
+from images import (ImageInfo, image_size, process_images)
+from manifest import (BuildManifest)
+from template import (compile_template)
+
+
+def png_header(width, height):
+    return b"\x89PNG\r\n\x1a\n" + b"\x00\x00\x00\x0dIHDR" + struct.pack(">II", width, height) + b"\x08\x06\x00\x00\x00"
+
+
+def jpeg_header(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof = b"\xff\xc0" + struct.pack(">HBHH", 11, 8, height, width) + b"\x01\x01\x11\x00"
+    return b"\xff\xd8" + app0 + sof
+
+
+class TestImageSize(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def size_of(self, data):
+        path = os.path.join(self.tmp.name, "image")
+        with open(path, "wb") as file:
+            file.write(data)
+        return image_size(path)
+
+    def test_formats(self):
+        self.assertEqual(self.size_of(png_header(928, 468)), (928, 468))
+        self.assertEqual(self.size_of(b"GIF89a" + struct.pack("<HH", 16, 9) + b"\x00" * 8), (16, 9))
+        self.assertEqual(self.size_of(jpeg_header(640, 480)), (640, 480))
+        vp8x = b"RIFF\x00\x00\x00\x00WEBPVP8X\x0a\x00\x00\x00\x00\x00\x00\x00"
+        vp8x += (1999).to_bytes(3, "little") + (999).to_bytes(3, "little")
+        self.assertEqual(self.size_of(vp8x), (2000, 1000))
+        self.assertIsNone(self.size_of(b"not an image at all, not at all"))
+
+
+class TestProcessImages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.static = os.path.join(self.tmp.name, "static")
+        self.public = os.path.join(self.tmp.name, "public")
+        os.makedirs(os.path.join(self.static, "images"))
+        self.png = os.path.join(self.static, "images", "tom.png")
+        with open(self.png, "wb") as file:
+            file.write(png_header(928, 468))
+        #old enough for the hash to be cached
+        os.utime(self.png, ns=(10 ** 18, 10 ** 18))
+        with open(os.path.join(self.static, "index.css"), "w") as file:
+            file.write("body {}")
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def process(self):
+        return process_images(ContentIndex(self.static, self.public), self.manifest)
+
+    @patch("images.Image", None)
+    def test_sizes_are_cached(self):
+        self.assertEqual(self.process(), {"/images/tom.png": ImageInfo(928, 468)})
+        self.manifest.save()
+        self.manifest = BuildManifest(self.manifest.path).load()
+        with patch("images.image_size") as image_size:
+            self.assertEqual(self.process(), {"/images/tom.png": ImageInfo(928, 468)})
+        image_size.assert_not_called()
+
+    @patch("images.Image", None)
+    def test_removed_images_are_forgotten(self):
+        self.process()
+        os.remove(self.png)
+        self.assertEqual(self.process(), {})
+        self.assertEqual(self.manifest.images, {})
+
+    @unittest.skipIf(images.Image is None, "Pillow is not installed")
+    def test_variants(self):
+        with images.Image.new("RGB", (1000, 500)) as image:
+            image.save(self.png)
+        info = self.process()["/images/tom.png"]
+        self.assertEqual([width for url, width in info.variants], [480, 960, 1000])
+        for url, width in info.variants:
+            self.assertTrue(os.path.exists(os.path.join(self.public, url[1:])))
+
+
+class TestImageProps(unittest.TestCase):
+    def test_render(self):
+        info = ImageInfo(1000, 500, [("/images/tom.0123.480w.webp", 480), ("/images/tom.0123.1000w.webp", 1000)])
+        template = compile_template("{{ Content }}", "/base/", minify=True, images={"/images/tom.png": info})
+        node = ParentNode("p", [
+            LeafNode("img", "", {"src": "/images/tom.png", "alt": "Tom"}),
+            LeafNode("img", "", {"src": "/images/other.png", "alt": "Other"}),
+        ])
+        self.assertEqual(
+            "".join(node.iter_html(template.rewriter.rewrite, template.minify, template.image_props)),
+            '<p><img src="/base/images/tom.png" alt="Tom" width="1000" height="500" loading="lazy" '
+            'srcset="/base/images/tom.0123.480w.webp 480w, /base/images/tom.0123.1000w.webp 1000w" '
+            'sizes="(max-width: 1000px) 100vw, 1000px"><img src="/base/images/other.png" alt="Other">',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
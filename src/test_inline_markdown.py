@@ -1,6 +1,7 @@
 import unittest
 from inline_markdown import (
-    split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link
+    split_nodes_delimiter, extract_markdown_images, extract_markdown_links, split_nodes_image, split_nodes_link,
+    text_to_textnodes
 )
 
 from textnode import TextNode, TextType
@@ -178,5 +179,86 @@ class TestInlineMarkdownSplitImagesAndLinks(unittest.TestCase):
         )
 
 
+def text_to_textnodes_multipass(text):
+    #the old way - one pass per delimiter, then images, then links
+    nodes = [TextNode(text, TextType.TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
+    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
+    nodes = split_nodes_image(nodes)
+    return split_nodes_link(nodes)
+
+
+class TestInlineMarkdownTextToTextNodes(unittest.TestCase):
+    def test_text_to_textnodes(self):
+        nodes = text_to_textnodes(
+            "This is **text** with an _italic_ word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)"
+        )
+        self.assertListEqual(
+            [
+                TextNode("This is ", TextType.TEXT),
+                TextNode("text", TextType.BOLD),
+                TextNode(" with an ", TextType.TEXT),
+                TextNode("italic", TextType.ITALIC),
+                TextNode(" word and a ", TextType.TEXT),
+                TextNode("code block", TextType.CODE),
+                TextNode(" and an ", TextType.TEXT),
+                TextNode("obi wan image", TextType.IMAGE, "https://i.imgur.com/fJRm4Vk.jpeg"),
+                TextNode(" and a ", TextType.TEXT),
+                TextNode("link", TextType.LINK, "https://boot.dev"),
+            ],
+            nodes,
+        )
+
+    def test_same_as_multipass(self):
+        texts = [
+            "plain text",
+            "",
+            "**bold** and _italic_ and `code`",
+            "**** empty bold",
+            "[< Back Home](/) and ![image](/images/tom.png) and ![second](/a.png)[link](/b)",
+            "a **bold [link](/x) inside** bold",
+            "link with _italic_ [text](https://boot.dev) after" * 50,
+            "Disney _didn't ruin it_ (okay, but Amazon might have)",
+        ]
+        for text in texts:
+            self.assertListEqual(text_to_textnodes_multipass(text), text_to_textnodes(text), text)
+
+    def test_delimiters_inside_links_and_code(self):
+        #the multipass version raises ValueError on both
+        self.assertListEqual(
+            [TextNode("see ", TextType.TEXT), TextNode("a", TextType.LINK, "https://x.com/a_b")],
+            text_to_textnodes("see [a](https://x.com/a_b)"),
+        )
+        self.assertListEqual(
+            [TextNode("a ", TextType.TEXT), TextNode("code _x_", TextType.CODE), TextNode(" b", TextType.TEXT)],
+            text_to_textnodes("a `code _x_` b"),
+        )
+
+    def test_differs_from_multipass(self):
+        text = "[](!****)"
+        self.assertListEqual([TextNode("", TextType.LINK, "!****")], text_to_textnodes(text))
+        self.assertListEqual([TextNode("[](!", TextType.TEXT), TextNode(")", TextType.TEXT)],
+                             text_to_textnodes_multipass(text))
+
+        #the passes pair the _ of the url with the one of snake_case, and mangle the link
+        text = "see [doc](https://x.com/my_page) for snake_case"
+        self.assertListEqual(
+            [TextNode("see ", TextType.TEXT), TextNode("doc", TextType.LINK, "https://x.com/my_page"),
+             TextNode(" for snake_case", TextType.TEXT)],
+            text_to_textnodes(text),
+        )
+        self.assertNotEqual(text_to_textnodes_multipass(text), text_to_textnodes(text))
+        self.assertListEqual(
+            [TextNode("a", TextType.LINK, "x_y"), TextNode(" _z", TextType.TEXT)],
+            text_to_textnodes("[a](x_y) _z"),
+        )
+
+    def test_not_closed(self):
+        for text in ["**bold", "snake_case", "`code", "**a** _b"]:
+            with self.assertRaises(ValueError):
+                text_to_textnodes(text)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+
+from listings import (generate_listings, page_url, tag_slug)
+from manifest import (BuildManifest)
+from template import (compile_template)
+
+
+class TestListings(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, "public")
+        self.manifest = BuildManifest(os.path.join(self.tmp.name, "manifest.json"))
+        self.manifest.set_environment({"template": "a"})
+        self.template = compile_template("<title>{{ Title }}</title>{{ Content }}", "/base/")
+        for i in range(5):
+            tags = "Books, tolkien" if i % 2 == 0 else "tolkien"
+            self.add_post(f"post{i}", f"Post {i}", f"2025-01-0{i + 1}", tags)
+        self.manifest.record_page("index.md", os.path.join(self.public, "index.html"), "hash",
+                                  meta={"title": "Home", "metadata": {}})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def add_post(self, name, title, date, tags):
+        self.manifest.record_page(
+            f"blog/{name}/index.md", os.path.join(self.public, "blog", name, "index.html"), "hash",
+            meta={"title": title, "metadata": {"date": date, "tags": tags}},
+        )
+
+    def read(self, *parts):
+        with open(os.path.join(self.public, *parts)) as file:
+            return file.read()
+
+    def generate(self):
+        return generate_listings(self.manifest, self.template, self.public, posts_per_page=2)
+
+    def next_build(self):
+        self.manifest.save()
+        self.manifest = BuildManifest(self.manifest.path).load()
+        self.manifest.set_environment({"template": "a"})
+
+    def test_blog_index(self):
+        written, unchanged = self.generate()
+        #blog: 3 pages, tolkien: 3 pages, books: 2 pages
+        self.assertEqual((written, unchanged), (8, 0))
+        self.assertEqual(
+            self.read("blog", "index.html"),
+            "<title>Blog</title><div><h1>Blog</h1><ul>"
+            '<li><a href="/base/blog/post4/">Post 4</a> <time>2025-01-05</time></li>'
+            '<li><a href="/base/blog/post3/">Post 3</a> <time>2025-01-04</time></li>'
+            '</ul><nav><a href="/base/blog/page/2/">Older posts</a></nav></div>',
+        )
+        self.assertIn(
+            '<nav><a href="/base/blog/page/2/">Newer posts</a></nav>',
+            self.read("blog", "page", "3", "index.html"),
+        )
+        self.assertIn("<title>Posts tagged Books - page 2</title>", self.read("tags", "books", "page", "2", "index.html"))
+
+    def test_unchanged_listings_are_not_written(self):
+        self.generate()
+        self.next_build()
+        self.assertEqual(self.generate(), (0, 8))
+
+    def test_only_shifted_listings_are_written(self):
+        self.generate()
+        self.next_build()
+        #post1 is on the second blog page and the second tolkien page only
+        self.add_post("post1", "Post 1 renamed", "2025-01-02", "tolkien")
+        self.assertEqual(self.generate(), (2, 6))
+        self.assertIn("Post 1 renamed", self.read("blog", "page", "2", "index.html"))
+
+    def test_stale_listings_are_deleted(self):
+        self.generate()
+        self.next_build()
+        for i in [0, 2, 4]:
+            self.add_post(f"post{i}", f"Post {i}", f"2025-01-0{i + 1}", "tolkien")
+        self.generate()
+        self.assertFalse(os.path.exists(os.path.join(self.public, "tags", "books")))
+
+    def test_hand_written_index_wins(self):
+        self.manifest.record_page("blog/index.md", os.path.join(self.public, "blog", "index.html"), "hash",
+                                  meta={"title": "My blog", "metadata": {}})
+        self.assertEqual(self.generate(), (7, 0))
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "index.html")))
+        self.assertNotIn("My blog", self.read("blog", "page", "2", "index.html"))
+
+    def test_page_url(self):
+        self.assertEqual(page_url(os.path.join(self.public, "index.html"), self.public), "/")
+        self.assertEqual(page_url(os.path.join(self.public, "blog", "tom", "index.html"), self.public), "/blog/tom/")
+        self.assertEqual(page_url(os.path.join(self.public, "about.html"), self.public), "/about.html")
+
+    def test_tag_slug(self):
+        self.assertEqual(tag_slug("Lord of the Rings!"), "lord-of-the-rings")
+
+
+if __name__ == "__main__":
+    unittest.main()
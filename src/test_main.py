@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import (patch)
+
+import main
+from main import (parse_args, build, rebuild_changes)
+from watch import (watch)
+
+
+class TestRebuildChanges(unittest.TestCase):
+    def setUp(self):
+        #main works on ./content, ./static, ./docs and ./template.html
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)
+        self.write(main.template_path, "<title>{{ Title }}</title><article>{{ Content }}</article>")
+        self.home = os.path.join(main.dir_path_content, "index.md")
+        self.about = os.path.join(main.dir_path_content, "about", "index.md")
+        self.css = os.path.join(main.dir_path_static, "index.css")
+        self.write(self.home, "# Home\n\nWelcome")
+        self.write(self.about, "# About\n\nMe")
+        self.write(self.css, "body {}")
+        self.args = parse_args(["--io-threads", "0", "--block-cache", "0"])
+        build(self.args)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(text)
+
+    def read(self, path):
+        with open(path) as file:
+            return file.read()
+
+    def output(self, *parts):
+        return os.path.join(main.dir_path_public, *parts)
+
+    def test_changed_page(self):
+        self.write(self.home, "# Home\n\nWelcome back")
+        with patch("main.build") as full_build:
+            rebuild_changes(self.args, [self.home], [])
+        full_build.assert_not_called()
+        self.assertIn("Welcome back", self.read(self.output("index.html")))
+
+    def test_changed_asset(self):
+        image = os.path.join(main.dir_path_static, "images", "tom.png")
+        self.write(image, "png")
+        rebuild_changes(self.args, [image], [])
+        self.assertEqual(self.read(self.output("images", "tom.png")), "png")
+
+    def test_removed_page_and_asset(self):
+        os.remove(self.about)
+        os.remove(self.css)
+        rebuild_changes(self.args, [], [self.about, self.css])
+        self.assertFalse(os.path.exists(self.output("about", "index.html")))
+        self.assertFalse(os.path.exists(self.output("index.css")))
+        self.assertTrue(os.path.exists(self.output("index.html")))
+
+    def test_changed_template_builds_every_page(self):
+        self.write(main.template_path, "<title>{{ Title }}</title><main>{{ Content }}</main>")
+        rebuild_changes(self.args, [main.template_path], [])
+        self.assertIn("<main>", self.read(self.output("index.html")))
+        self.assertIn("<main>", self.read(self.output("about", "index.html")))
+
+    def test_removed_template(self):
+        os.remove(main.template_path)
+        rebuild_changes(self.args, [], [main.template_path])
+        self.assertTrue(os.path.exists(self.output("index.html")))
+
+    def test_watch_survives_failed_rebuild(self):
+        calls = []
+
+        def on_change(changed, removed):
+            calls.append(changed)
+            raise FileNotFoundError(main.template_path)
+
+        with patch("watch.snapshot", side_effect=[{}, {"a": 1}, {"a": 2}]):
+            watch(["."], on_change, interval=0, polls=2)
+        self.assertEqual(calls, [["a"], ["a"]])
+
+
+if __name__ == "__main__":
+    unittest.main()
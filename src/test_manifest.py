@@ -0,0 +1,120 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import (patch)
+
+from manifest import (BuildManifest)
+
+
+class TestBuildManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        self.source = os.path.join(self.dir, "index.md")
+        self.dest = os.path.join(self.dir, "out", "index.html")
+        self.manifest_path = os.path.join(self.dir, "manifest.json")
+        with open(self.source, "w") as file:
+            file.write("# title")
+        os.makedirs(os.path.dirname(self.dest))
+        with open(self.dest, "w") as file:
+            file.write("<h1>title</h1>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build(self, environment=None):
+        manifest = BuildManifest(self.manifest_path).load()
+        manifest.set_environment(environment or {"template": "a"})
+        return manifest
+
+    def test_loaded(self):
+        self.assertFalse(self.build().loaded)
+        self.build().save()
+        self.assertTrue(self.build().loaded)
+
+    def test_new_page_is_stale(self):
+        manifest = self.build()
+        is_current, digest = manifest.check_page(self.source, self.dest)
+        self.assertFalse(is_current)
+
+    def test_unchanged_page_is_current(self):
+        manifest = self.build()
+        is_current, digest = manifest.check_page(self.source, self.dest)
+        manifest.record_page(self.source, self.dest, digest)
+        manifest.save()
+
+        manifest = self.build()
+        is_current, digest = manifest.check_page(self.source, self.dest)
+        self.assertTrue(is_current)
+
+    def test_changed_source_is_stale(self):
+        manifest = self.build()
+        is_current, digest = manifest.check_page(self.source, self.dest)
+        manifest.record_page(self.source, self.dest, digest)
+        manifest.save()
+        with open(self.source, "w") as file:
+            file.write("# new title")
+
+        manifest = self.build()
+        is_current, digest = manifest.check_page(self.source, self.dest)
+        self.assertFalse(is_current)
+
+    def test_unchanged_stat_is_not_hashed(self):
+        old = os.stat(self.source)
+        #an old mtime, so the stat is trusted
+        os.utime(self.source, ns=(old.st_atime_ns, old.st_mtime_ns - 10 * 1000 * 1000 * 1000))
+        manifest = self.build()
+        is_current, digest = manifest.check_page(self.source, self.dest)
+        manifest.record_page(self.source, self.dest, digest, os.stat(self.source))
+        manifest.save()
+
+        manifest = self.build()
+        with patch("manifest.hash_file") as hash_file:
+            is_current, digest = manifest.check_page(self.source, self.dest, os.stat(self.source))
+        self.assertTrue(is_current)
+        hash_file.assert_not_called()
+
+    def test_recent_stat_is_hashed(self):
+        manifest = self.build()
+        is_current, digest = manifest.check_page(self.source, self.dest)
+        manifest.record_page(self.source, self.dest, digest, os.stat(self.source))
+        self.assertNotIn("mtime_ns", manifest.pages[self.source])
+
+    def test_touched_source_is_current(self):
+        manifest = self.build()
+        is_current, digest = manifest.check_page(self.source, self.dest)
+        manifest.record_page(self.source, self.dest, digest, os.stat(self.source))
+        manifest.save()
+        os.utime(self.source, ns=(0, 1000))
+
+        manifest = self.build()
+        is_current, digest = manifest.check_page(self.source, self.dest, os.stat(self.source))
+        self.assertTrue(is_current)
+        self.assertEqual(manifest.pages[self.source]["mtime_ns"], 1000)
+
+    def test_changed_environment_is_stale(self):
+        manifest = self.build()
+        is_current, digest = manifest.check_page(self.source, self.dest)
+        manifest.record_page(self.source, self.dest, digest)
+        manifest.save()
+
+        manifest = self.build({"template": "b"})
+        is_current, digest = manifest.check_page(self.source, self.dest)
+        self.assertFalse(is_current)
+
+    def test_prune_removes_outputs_of_deleted_sources(self):
+        manifest = self.build()
+        is_current, digest = manifest.check_page(self.source, self.dest)
+        manifest.record_page(self.source, self.dest, digest)
+        manifest.save()
+
+        manifest = self.build()
+        removed = manifest.prune()
+        self.assertEqual(removed, [self.dest])
+        self.assertFalse(os.path.exists(self.dest))
+        self.assertFalse(os.path.exists(os.path.dirname(self.dest)))
+        self.assertEqual(manifest.pages, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+
+from page_meta import (PageMeta, split_front_matter)
+
+
+class TestSplitFrontMatter(unittest.TestCase):
+    def test_no_front_matter(self):
+        metadata, lines = split_front_matter(["# title\n", "\n", "text\n"])
+        self.assertEqual(metadata, {})
+        self.assertEqual(list(lines), ["# title\n", "\n", "text\n"])
+
+    def test_empty(self):
+        metadata, lines = split_front_matter([])
+        self.assertEqual(metadata, {})
+        self.assertEqual(list(lines), [])
+
+    def test_front_matter(self):
+        metadata, lines = split_front_matter(
+            ["---\n", "Title: My post\n", "\n", "date: 2025-01-31\n", "link: http://a.b/c\n", "---\n", "# title\n"]
+        )
+        self.assertEqual(metadata, {"title": "My post", "date": "2025-01-31", "link": "http://a.b/c"})
+        self.assertEqual(list(lines), ["# title\n"])
+
+    def test_not_closed(self):
+        #not front matter, the page is kept whole
+        metadata, lines = split_front_matter(["---\n", "title: x\n", "# title\n", "text\n"])
+        self.assertEqual(metadata, {})
+        self.assertEqual(list(lines), ["---\n", "title: x\n", "# title\n", "text\n"])
+        metadata, lines = split_front_matter(["---\n", "title: x\n"])
+        self.assertEqual((metadata, list(lines)), ({}, ["---\n", "title: x\n"]))
+
+    def test_invalid_line(self):
+        metadata, lines = split_front_matter(["---\n", "no separator\n", "---\n"])
+        self.assertEqual(metadata, {})
+        self.assertEqual(list(lines), ["---\n", "no separator\n", "---\n"])
+
+
+class TestPageMeta(unittest.TestCase):
+    def test_round_trip(self):
+        meta = PageMeta("Title", {"tags": "a, b"})
+        self.assertEqual(PageMeta.from_dict(meta.to_dict()), meta)
+        self.assertEqual(meta.get("tags"), "a, b")
+        self.assertIsNone(meta.get("date"))
+
+
+if __name__ == "__main__":
+    unittest.main()
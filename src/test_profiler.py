@@ -0,0 +1,35 @@
+import io
+import unittest
+
+from profiler import (PageProfile, BuildProfile, page_stages)
+
+
+class TestProfiler(unittest.TestCase):
+    def test_stage_accumulates(self):
+        profile = PageProfile("index.md")
+        with profile.stage("read"):
+            data = [str(i) for i in range(1000)]
+        with profile.stage("read"):
+            pass
+        self.assertEqual(list(profile.timings), ["read"])
+        self.assertGreater(profile.timings["read"], 0)
+        self.assertGreater(profile.allocations["read"], 0)
+
+    def test_report(self):
+        build = BuildProfile()
+        for path, seconds in [("fast.md", 0.001), ("slow.md", 0.5)]:
+            page = PageProfile(path)
+            for name in page_stages:
+                page.timings[name] = seconds
+                page.allocations[name] = 1
+            build.add(page)
+        out = io.StringIO()
+        build.report(top=1, out=out)
+        report = out.getvalue()
+        self.assertIn("Profile of 2 page(s)", report)
+        self.assertIn("slow.md", report)
+        self.assertNotIn("fast.md", report)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import io
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from template import (UrlRewriter, compile_template, minify_template)
+
+
+class TestUrlRewriter(unittest.TestCase):
+    def test_rewrite_absolute(self):
+        rewriter = UrlRewriter("/static_site_gen/")
+        self.assertEqual(rewriter.rewrite("/blog/tom"), "/static_site_gen/blog/tom")
+
+    def test_rewrite_keeps_external(self):
+        rewriter = UrlRewriter("/static_site_gen/")
+        self.assertEqual(rewriter.rewrite("https://www.boot.dev"), "https://www.boot.dev")
+
+
+class TestTemplate(unittest.TestCase):
+    def test_segments(self):
+        template = compile_template('<title>{{ Title }}</title><link href="/index.css"><article>{{ Content }}</article>', "/base/")
+        self.assertEqual(
+            template.segments,
+            [
+                ("text", "<title>"),
+                ("slot", "Title"),
+                ("text", '</title><link href="/base/index.css"><article>'),
+                ("slot", "Content"),
+                ("text", "</article>"),
+            ],
+        )
+
+    def test_render(self):
+        template = compile_template("<title>{{ Title }}</title><article>{{ Content }}</article>", "/base/")
+        node = ParentNode("div", [
+            LeafNode("a", "home", {"href": "/"}),
+            LeafNode("img", "", {"src": "/images/tom.png", "alt": "Tom"}),
+        ])
+        out = io.StringIO()
+        template.render(out, "Tom", node)
+        self.assertEqual(
+            out.getvalue(),
+            '<title>Tom</title><article><div><a href="/base/">home</a><img src="/base/images/tom.png" alt="Tom"></img></div></article>',
+        )
+
+    def test_render_escapes_title(self):
+        template = compile_template("<title>{{ Title }}</title><article>{{ Content }}</article>", "/")
+        out = io.StringIO()
+        template.render(out, "Tom & <Goldberry>", ParentNode("div", [LeafNode(None, "x")]))
+        self.assertEqual(out.getvalue(), "<title>Tom &amp; &lt;Goldberry&gt;</title><article><div>x</div></article>")
+        self.assertEqual(template.extract_content(out.getvalue(), "Tom & <Goldberry>"), "<div>x</div>")
+
+    def test_extract_content(self):
+        template = compile_template("<title>{{ Title }}</title><article>{{ Content }}</article><p>{{ Title }}</p>", "/")
+        html = "<title>Tom</title><article><div>body</div></article><p>Tom</p>"
+        self.assertEqual(template.extract_content(html, "Tom"), "<div>body</div>")
+        self.assertIsNone(template.extract_content(html, "Other"))
+        self.assertIsNone(compile_template("{{ Content }}{{ Content }}", "/").extract_content(html, "Tom"))
+
+    def test_minify_template(self):
+        template = """<!doctype html>
+<html>
+  <head>
+    <!-- the title -->
+    <title>{{ Title }}</title>
+    <link href="/index.css"   rel="stylesheet" />
+  </head>
+
+  <body>
+    <pre>  keep
+    this </pre>
+    <article>{{ Content }}</article>
+  </body>
+</html>
+"""
+        self.assertEqual(
+            minify_template(template),
+            '<!doctype html><html><head><title>{{ Title }}</title><link href="/index.css" rel="stylesheet"></head>'
+            "<body><pre>  keep\n    this </pre><article>{{ Content }}</article>",
+        )
+
+    def test_minify_template_keeps_space_between_inline_tags(self):
+        template = "<nav>\n  <a href=\"/\">Home</a>\n  <a href=\"/blog\">Blog</a>\n</nav>\n<pre>x</pre>\n<div>y</div>"
+        self.assertEqual(minify_template(template),
+                         '<nav> <a href="/">Home</a> <a href="/blog">Blog</a> </nav><pre>x</pre><div>y</div>')
+        self.assertEqual(minify_template("<textarea>x</textarea>\n  <b>y</b>"), "<textarea>x</textarea> <b>y</b>")
+
+    def test_minify_template_keeps_self_closing_svg(self):
+        template = '<svg><path d=""/><circle r="1" /></svg><br /><img src="/a.png"/>'
+        self.assertEqual(minify_template(template),
+                         '<svg><path d=""/><circle r="1" /></svg><br><img src="/a.png">')
+
+    def test_render_minify(self):
+        template = compile_template("<title>{{ Title }}</title>\n  <article>{{ Content }}</article>\n", "/base/",
+                                    minify=True)
+        out = io.StringIO()
+        template.render(out, "Tom", ParentNode("div", [ParentNode("p", [LeafNode("a", "home", {"href": "/"})])]))
+        self.assertEqual(out.getvalue(), '<title>Tom</title><article><div><p><a href="/base/">home</a></div></article>')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -24,6 +24,10 @@ class TestTextNode(unittest.TestCase):
             "TextNode(This is a text node, text, https://www.boot.dev)", repr(node)
         )
 
+    def test_no_instance_dict(self):
+        node = TextNode("This is a text node", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
+
 class TestTextNodeToHTMLNode(unittest.TestCase):
     def test_text(self):
         node = TextNode("This is a text node", TextType.TEXT)
@@ -36,10 +40,16 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
         html_node = text_node_to_html_node(node)
         self.assertEqual(html_node.tag, "img")
         self.assertEqual(html_node.value, "")
-        self.assertEqual(
-            html_node.props,
-            {"src": "https://www.boot.dev", "alt": "This is an image"},
-        )
+        self.assertEqual((html_node.url, html_node.alt), ("https://www.boot.dev", "This is an image"))
+        self.assertEqual(html_node.props, None)
+        self.assertEqual(html_node.to_html(), '<img src="https://www.boot.dev" alt="This is an image"></img>')
+
+    def test_link(self):
+        node = TextNode("a \"link\"", TextType.LINK, "/blog?a=1&b=2")
+        html_node = text_node_to_html_node(node)
+        self.assertEqual(html_node.props, None)
+        self.assertEqual(html_node.to_html(lambda url: "/base" + url),
+                         '<a href="/base/blog?a=1&amp;b=2">a "link"</a>')
         
     def test_bold(self):
         node = TextNode("This is bold", TextType.BOLD)
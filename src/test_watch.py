@@ -0,0 +1,42 @@
+import os
+import tempfile
+import unittest
+
+from watch import (snapshot, diff_snapshots)
+
+
+class TestWatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = self.tmp.name
+        os.makedirs(os.path.join(self.dir, "content", "blog"))
+        self.page = os.path.join(self.dir, "content", "blog", "index.md")
+        self.template = os.path.join(self.dir, "template.html")
+        self.write(self.page, "# post")
+        self.write(self.template, "{{ Content }}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as file:
+            file.write(text)
+
+    def test_snapshot(self):
+        files = snapshot([os.path.join(self.dir, "content"), self.template])
+        self.assertEqual(sorted(files), sorted([self.page, self.template]))
+
+    def test_diff_snapshots(self):
+        paths = [os.path.join(self.dir, "content"), self.template]
+        old = snapshot(paths)
+        new_page = os.path.join(self.dir, "content", "new.md")
+        self.write(new_page, "# new")
+        self.write(self.page, "# post, edited")
+        os.remove(self.template)
+        changed, removed = diff_snapshots(old, snapshot(paths))
+        self.assertEqual(changed, sorted([self.page, new_page]))
+        self.assertEqual(removed, [self.template])
+
+
+if __name__ == "__main__":
+    unittest.main()
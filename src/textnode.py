@@ -11,6 +11,8 @@ class TextType(Enum):
     IMAGE   = "image"
 
 class TextNode():
+    __slots__ = ("text", "text_type", "url")
+
     def __init__(self, text, text_type, url=None):
         self.text = text
         self.text_type = text_type
@@ -35,8 +37,9 @@ def text_node_to_html_node(text_node):
         case TextType.CODE:
             return LeafNode("code", text_node.text)
         case TextType.LINK:
-            return LeafNode("a", text_node.text, {"href": text_node.url})
+            #no props dict per link or image, the url is kept in a slot
+            return LeafNode("a", text_node.text, url=text_node.url)
         case TextType.IMAGE:
-            return LeafNode("img", "", {"src": text_node.url, "alt": text_node.text})
+            return LeafNode("img", "", url=text_node.url, alt=text_node.text)
         case _:
             raise Exception(f"Invalid text type: {text_node.text_type}")
\ No newline at end of file
@@ -0,0 +1,84 @@
+import functools
+import os
+import threading
+import time
+from http.server import (SimpleHTTPRequestHandler, ThreadingHTTPServer)
+
+
+def snapshot(paths):
+    '''
+    Docstring for snapshot
+    Goal: record (mtime, size) of every file under the given files and directories
+
+    :param paths: list of file or directory paths
+    :returns: dict path -> (mtime_ns, size)
+    '''
+    files = {}
+    stack = []
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            files[path] = (stat.st_mtime_ns, stat.st_size)
+        elif os.path.isdir(path):
+            stack.append(path)
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    stack.append(entry.path)
+                elif entry.is_file():
+                    stat = entry.stat()
+                    files[entry.path] = (stat.st_mtime_ns, stat.st_size)
+    return files
+
+
+def diff_snapshots(old, new):
+    '''
+    Docstring for diff_snapshots
+    Goal: compare two snapshots
+
+    :returns: tuple (changed, removed) - changed also has the new files
+    '''
+    changed = sorted(path for path, stat in new.items() if old.get(path) != stat)
+    removed = sorted(path for path in old if path not in new)
+    return changed, removed
+
+
+def watch(paths, on_change, interval=0.3, polls=None):
+    '''
+    Docstring for watch
+    Goal: poll the paths forever and call on_change(changed, removed) when something changes
+    Polling needs no extra library (inotify is Linux only and not in the standard library)
+    An error in on_change is printed and the polling goes on - a file caught half saved (or
+    deleted for a moment) must not stop the watcher and the server with it
+
+    :param interval: seconds between two polls
+    :param polls: stop after this many polls, None polls forever
+    '''
+    previous = snapshot(paths)
+    while polls is None or polls > 0:
+        if polls is not None:
+            polls -= 1
+        time.sleep(interval)
+        current = snapshot(paths)
+        changed, removed = diff_snapshots(previous, current)
+        if len(changed) > 0 or len(removed) > 0:
+            try:
+                on_change(changed, removed)
+            except Exception as e:
+                print(f"Rebuild failed, waiting for the next change: {e!r}")
+        previous = current
+
+
+def serve(directory, port):
+    '''
+    Docstring for serve
+    Goal: serve the directory over http from a background thread of this process
+
+    :returns: the server, call .shutdown() to stop it
+    '''
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=directory)
+    server = ThreadingHTTPServer(("", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server